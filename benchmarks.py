@@ -0,0 +1,251 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+
+RESULTS_PATH = 'benchmark_results.jsonl'
+SEED = 20240101
+START = '2020-01-01'
+MINUTES_PER_DAY = 24 * 60
+
+# Data sizes per scale: days of 1-minute bars for the single-series
+# benchmarks, tickers (with ticker_days of bars each) for the multi-ticker one
+# and paths for the price simulation
+SCALES = {
+    'tiny': {'days': 1, 'tickers': 1, 'ticker_days': 1, 'paths': 10_000},
+    'small': {'days': 7, 'tickers': 10, 'ticker_days': 1, 'paths': 100_000},
+    'medium': {'days': 90, 'tickers': 100, 'ticker_days': 7, 'paths': 1_000_000},
+    'large': {'days': 730, 'tickers': 500, 'ticker_days': 7, 'paths': 10_000_000},
+}
+
+# Deterministic 1-minute OHLCV bars: a GBM close with intrabar highs and lows
+# around it. The same seed and ticker number always give the same frame, so
+# every version is timed on identical data without touching a provider.
+def synthetic_ohlcv(num_bars, seed=SEED, ticker=0, initial_price=30000.0, annual_volatility=0.6, start=START):
+    rng = np.random.default_rng(np.random.SeedSequence([seed, ticker]))
+    minute_volatility = annual_volatility / np.sqrt(365 * MINUTES_PER_DAY)
+    log_returns = minute_volatility * rng.standard_normal(num_bars)
+    close = initial_price * np.exp(np.cumsum(log_returns))
+    open_ = np.concatenate(([initial_price], close[:-1]))
+    spread = np.abs(rng.standard_normal((2, num_bars))) * minute_volatility
+    high = np.maximum(open_, close) * (1 + spread[0])
+    low = np.minimum(open_, close) * (1 - spread[1])
+    volume = rng.lognormal(mean=1.0, sigma=1.0, size=num_bars)
+
+    index = pd.date_range(start, periods=num_bars, freq='min', name='Datetime')
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}, index=index)
+
+# One synthetic frame per ticker, each with its own random stream
+def synthetic_universe(num_tickers, num_bars, seed=SEED):
+    return {f"SYN{i}-USD": synthetic_ohlcv(num_bars, seed=seed, ticker=i) for i in range(num_tickers)}
+
+def _price_frame(df):
+    return df[['Close']].rename(columns={'Close': 'price'})
+
+# Every benchmark takes a scale and returns (run, units, unit): a no-argument
+# callable doing only the work being timed, with its input already built, and
+# how many units of work one call does. Modules are imported here so that only
+# the benchmarks selected pay for their imports.
+def bench_best_time_to_buy(scale):
+    from best_time_to_buy import best_time_to_buy
+
+    df = _price_frame(synthetic_ohlcv(scale['days'] * MINUTES_PER_DAY))
+    return lambda: best_time_to_buy(df, '1m'), len(df), 'rows'
+
+def bench_best_time_to_buy_tickers(scale):
+    from best_time_to_buy import best_time_to_buy
+
+    frames = [_price_frame(df) for df in synthetic_universe(scale['tickers'], scale['ticker_days'] * MINUTES_PER_DAY).values()]
+    return lambda: [best_time_to_buy(df, '1m') for df in frames], sum(len(df) for df in frames), 'rows'
+
+def bench_calculate_optimal_dca_levels(scale):
+    from dca_strategies import calculate_optimal_dca_levels
+
+    df = synthetic_ohlcv(scale['days'] * MINUTES_PER_DAY)
+    return lambda: calculate_optimal_dca_levels(df, num_levels=5), len(df), 'rows'
+
+def bench_simulate_dca_strategy(scale):
+    from dca_strategies import calculate_optimal_dca_levels, simulate_dca_strategy
+
+    df = synthetic_ohlcv(scale['days'] * MINUTES_PER_DAY)
+    levels = calculate_optimal_dca_levels(df, num_levels=5)
+    return lambda: simulate_dca_strategy(df, levels, 100), len(df), 'rows'
+
+def bench_calculate_btc_accumulated(scale):
+    from compare_daily_bimonthly import calculate_btc_accumulated
+
+    df = synthetic_ohlcv(scale['days'] * MINUTES_PER_DAY)
+    return lambda: calculate_btc_accumulated(df, 10, strategy='twice_per_month'), len(df), 'rows'
+
+def bench_simulate_price(scale):
+    from price_simulation import simulate_price
+
+    num_paths = scale['paths']
+    return lambda: simulate_price(30000.0, 0.0005, 0.03, num_paths, 365, seed=SEED), num_paths, 'paths'
+
+BENCHMARKS = {
+    'best_time_to_buy': bench_best_time_to_buy,
+    'best_time_to_buy_tickers': bench_best_time_to_buy_tickers,
+    'calculate_optimal_dca_levels': bench_calculate_optimal_dca_levels,
+    'simulate_dca_strategy': bench_simulate_dca_strategy,
+    'calculate_btc_accumulated': bench_calculate_btc_accumulated,
+    'simulate_price': bench_simulate_price,
+}
+
+# Best wall time over `repeat` calls, then one more call under tracemalloc for
+# the peak memory it allocates (numpy and pandas buffers included). Tracing
+# slows the code down, so it is kept out of the timed calls.
+def measure(run, repeat=3, memory=True):
+    run()  # Warm up imports and caches
+    seconds = []
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        run()
+        seconds.append(time.perf_counter() - started)
+
+    peak_bytes = None
+    if memory:
+        tracemalloc.start()
+        try:
+            run()
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return min(seconds), peak_bytes
+
+def run_benchmarks(names, scales, repeat=3, memory=True, progress=None):
+    results = []
+    for scale_name in scales:
+        for name in names:
+            run, units, unit = BENCHMARKS[name](SCALES[scale_name])
+            seconds, peak_bytes = measure(run, repeat, memory)
+            result = {
+                'benchmark': name,
+                'scale': scale_name,
+                'units': units,
+                'unit': unit,
+                'seconds': seconds,
+                'throughput': units / seconds if seconds > 0 else float('inf'),
+                'peak_mb': peak_bytes / 2**20 if peak_bytes is not None else None,
+            }
+            results.append(result)
+            if progress is not None:
+                progress(result)
+    return results
+
+# Short description of the checked-out code, so runs can be told apart
+def code_version():
+    try:
+        described = subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return described.stdout.strip() or None
+
+def run_record(results, label=None):
+    return {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'label': label,
+        'version': code_version(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+# Runs are appended to a JSON-lines history, one run per line, so runs from
+# different versions accumulate in one file
+def append_run(path, record):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'a') as f:
+        f.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+def load_runs(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+# The newest earlier run whose label or version matches `baseline`, or simply
+# the newest earlier run without one
+def find_baseline(runs, baseline=None):
+    for run in reversed(runs):
+        if baseline is None or baseline in (run.get('label'), run.get('version')):
+            return run
+    return None
+
+# Time ratio of every result against the same benchmark and scale in the
+# baseline run; above 1 means slower than the baseline
+def compare_runs(results, baseline):
+    previous = {(r['benchmark'], r['scale']): r for r in baseline['results']}
+    rows = []
+    for result in results:
+        before = previous.get((result['benchmark'], result['scale']))
+        if before is None or before['units'] != result['units']:
+            continue
+        rows.append({
+            'benchmark': result['benchmark'],
+            'scale': result['scale'],
+            'before': before['seconds'],
+            'after': result['seconds'],
+            'ratio': result['seconds'] / before['seconds'] if before['seconds'] > 0 else float('inf'),
+        })
+    return rows
+
+def _format_result(result):
+    peak = f"{result['peak_mb']:10.1f} MB" if result['peak_mb'] is not None else f"{'-':>13}"
+    return (f"{result['benchmark']:<30} {result['scale']:<7} {result['units']:>12,} {result['unit']:<5} "
+            f"{result['seconds']:10.4f} s {result['throughput']:14,.0f} {result['unit']}/s {peak}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the analyses on deterministic synthetic data, offline, and compare against earlier runs.')
+    parser.add_argument('--benchmarks', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS), help='Benchmarks to run (default: all)')
+    parser.add_argument('--scales', nargs='+', choices=list(SCALES), default=['small'], help='Data scales to run (default: small)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed calls per benchmark; the fastest is kept (default: 3)')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the extra traced call that measures peak memory')
+    parser.add_argument('--output', type=str, default=RESULTS_PATH, help=f'JSON-lines file the run is appended to (default: {RESULTS_PATH})')
+    parser.add_argument('--no-save', action='store_true', help='Do not append this run to --output')
+    parser.add_argument('--label', type=str, help='Name for this run, e.g. a branch or release')
+    parser.add_argument('--baseline', type=str, help='Label or version of the run to compare against (default: the previous run)')
+    parser.add_argument('--max-slowdown', type=float, help='Exit with status 1 if any benchmark is more than this many times slower than the baseline')
+
+    args = parser.parse_args()
+
+    print(f"{'benchmark':<30} {'scale':<7} {'size':>18} {'time':>12} {'throughput':>20} {'peak memory':>13}")
+    results = run_benchmarks(args.benchmarks, args.scales, args.repeat, not args.no_memory,
+                             progress=lambda result: print(_format_result(result), flush=True))
+
+    baseline = find_baseline(load_runs(args.output), args.baseline)
+    if not args.no_save:
+        append_run(args.output, run_record(results, args.label))
+        print(f"Results appended to {args.output}")
+
+    if baseline is None:
+        if args.baseline:
+            print(f"No run named {args.baseline} in {args.output} to compare against.")
+        return
+
+    rows = compare_runs(results, baseline)
+    name = baseline.get('label') or baseline.get('version') or baseline['created_at']
+    print(f"\nCompared with {name} ({baseline['created_at']}):")
+    for row in rows:
+        print(f"{row['benchmark']:<30} {row['scale']:<7} {row['before']:10.4f} s -> {row['after']:10.4f} s  x{row['ratio']:.2f}")
+
+    if args.max_slowdown is not None:
+        slower = [row for row in rows if row['ratio'] > args.max_slowdown]
+        if slower:
+            print(f"{len(slower)} benchmark(s) slowed down by more than x{args.max_slowdown:g}.")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
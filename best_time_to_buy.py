@@ -1,176 +1,108 @@
-import requests
-import yfinance as yf
+import http_client
+import numpy as np
 import pandas as pd
 import argparse
-from datetime import datetime, timedelta
-from prettytable import PrettyTable
-
-# Mapping of common ticker symbols to CoinGecko identifiers
-COINGECKO_TICKER_MAP = {
-    'BTC-USD': 'bitcoin',
-    'ETH-USD': 'ethereum',
-    'LTC-USD': 'litecoin',
-    'XRP-USD': 'ripple',
-    'BCH-USD': 'bitcoin-cash',
-    'ADA-USD': 'cardano',
-    'DOT-USD': 'polkadot',
-    'LINK-USD': 'chainlink',
-    'DOGE-USD': 'dogecoin',
-    # Add more mappings as needed
-}
-
-def fetch_coinbase_data(ticker, interval, period):
-    base_url = "https://api.pro.coinbase.com"
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from coingecko_coins import coingecko_id
+from coinbase_candles import GRANULARITY_MAP as COINBASE_GRANULARITY_MAP, fetch_candles as fetch_coinbase_candles
+from cryptocompare_candles import fetch_candles as fetch_cryptocompare_candles
+from providers import COINGECKO_URL, coingecko_prices_frame
+from seasonality import RunningProfile, bucket_time, time_of_day_profile
+from ticker_lists import read_tickers
+from ohlcv_cache import CACHE_DIR, cached_fetch, cached_yfinance_download, cached_yfinance_download_many, interval_length, period_to_start
+
+# Saved time-of-day profiles for --incremental runs
+PROFILE_DIR = os.path.join(os.path.dirname(CACHE_DIR), 'profiles')
+
+# Every fetch_*_data covers `period` back from now, or everything since `start`
+# when one is given
+def fetch_coinbase_data(ticker, interval, period, start=None):
     end_time = datetime.utcnow()
-    start_time = end_time - timedelta(days=int(period[:-1]))
-
-    granularity_map = {
-        '1m': 60,
-        '5m': 300,
-        '15m': 900,
-        '30m': 1800,
-        '60m': 3600,
-        '6h': 21600,
-        '1d': 86400
-    }
-    
-    granularity = granularity_map.get(interval, 300)
-    total_seconds = (end_time - start_time).total_seconds()
-    max_data_points = 300
-
-    while total_seconds / granularity > max_data_points:
-        interval, granularity = next((k, v) for k, v in granularity_map.items() if v > granularity)
-    
-    url = f"{base_url}/products/{ticker}/candles"
-    params = {
-        'start': start_time.isoformat(),
-        'end': end_time.isoformat(),
-        'granularity': granularity
-    }
-
-    response = requests.get(url, params=params)
-    if response.status_code != 200:
-        raise Exception(f"Error fetching data: {response.status_code} - {response.text}")
+    start_time = start if start is not None else period_to_start(period, end_time)
+    granularity = COINBASE_GRANULARITY_MAP.get(interval, 300)
 
-    data = response.json()
-    if not data:
+    df = cached_fetch('coinbase', ticker, interval, start_time, end_time,
+                      lambda start, end: fetch_coinbase_candles(ticker, granularity, start, end))
+    if df.empty:
         raise Exception("No data returned from API.")
 
-    df = pd.DataFrame(data, columns=['time', 'low', 'high', 'open', 'close', 'volume'])
-    df['time'] = pd.to_datetime(df['time'], unit='s')
-    df.set_index('time', inplace=True)
-    df.rename(columns={"close": "price"}, inplace=True)
+    df = df.rename(columns={"close": "price"})
 
     print(f"Coinbase Data:\n{df.head()}")  # Debug print
 
     return df[['price']]
 
-def fetch_coingecko_data(ticker, interval, period):
-    base_url = "https://api.coingecko.com/api/v3"
-    end_date = datetime.utcnow()
-    start_date = end_date - timedelta(days=int(period[:-1]))
-
-    if ticker in COINGECKO_TICKER_MAP:
-        coingecko_ticker = COINGECKO_TICKER_MAP[ticker]
-    else:
-        raise ValueError(f"Unknown ticker symbol: {ticker}")
-
-    url = f"{base_url}/coins/{coingecko_ticker}/market_chart/range"
+def _fetch_coingecko_prices(coingecko_ticker, interval, start_date, end_date):
+    url = f"{COINGECKO_URL}/coins/{coingecko_ticker}/market_chart/range"
     params = {
         'vs_currency': 'usd',
         'from': int(start_date.timestamp()),
         'to': int(end_date.timestamp())
     }
 
+    response = http_client.get(url, params=params)
+    response.raise_for_status()
+    return coingecko_prices_frame(response.json(), interval)
+
+def fetch_coingecko_data(ticker, interval, period, start=None):
+    end_date = datetime.utcnow()
+    start_date = start if start is not None else period_to_start(period, end_date)
+
+    # Map e.g. XYZ-USD to its CoinGecko id via the cached coin registry
+    coingecko_ticker = coingecko_id(ticker)
+
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        if 'prices' not in data:
+        df = cached_fetch('coingecko', coingecko_ticker, interval, start_date, end_date,
+                          lambda start, end: _fetch_coingecko_prices(coingecko_ticker, interval, start, end))
+        if df.empty:
             raise ValueError("No price data returned from API.")
-        
-        prices = data['prices']
-        df = pd.DataFrame(prices, columns=['time', 'price'])
-        df['time'] = pd.to_datetime(df['time'], unit='ms')
-        df.set_index('time', inplace=True)
-
-        # Adjust for intervals
-        if interval == '1m':
-            df = df.resample('1T').mean()
-        elif interval == '5m':
-            df = df.resample('5T').mean()
-        elif interval == '15m':
-            df = df.resample('15T').mean()
-        elif interval == '30m':
-            df = df.resample('30T').mean()
-        elif interval == '60m':
-            df = df.resample('H').mean()
-        elif interval == '1d':
-            df = df.resample('D').mean()
-        else:
-            raise ValueError(f"Unsupported interval: {interval}")
-
-        df.dropna(inplace=True)
 
         print(f"CoinGecko Data:\n{df.head()}")  # Debug print
 
         return df[['price']]
     
-    except requests.RequestException as e:
+    except http_client.request_error() as e:
         raise Exception(f"Error fetching data: {e}")
     except ValueError as e:
         raise Exception(f"Data processing error: {e}")
 
-def fetch_cryptocompare_data(ticker, interval, period):
-    base_url = "https://min-api.cryptocompare.com/data/v2/histoday"
+# Candles at the requested interval from histominute/histohour/histoday, with
+# ranges beyond one 2000-bar page fetched as concurrent pages
+def fetch_cryptocompare_data(ticker, interval, period, start=None):
     end_time = datetime.utcnow()
-    start_time = end_time - timedelta(days=int(period[:-1]))
-
-    params = {
-        'fsym': ticker.split('-')[0],
-        'tsym': 'USD',
-        'limit': int(period[:-1]),
-        'toTs': int(end_time.timestamp())
-    }
-
-    response = requests.get(base_url, params=params)
-    if response.status_code != 200:
-        raise Exception(f"Error fetching data: {response.status_code} - {response.text}")
+    start_time = start if start is not None else period_to_start(period, end_time)
 
-    data = response.json()
-    if 'Data' not in data:
+    df = cached_fetch('cryptocompare', ticker, interval, start_time, end_time,
+                      lambda start, end: fetch_cryptocompare_candles(ticker, interval, start, end))
+    if df.empty:
         raise Exception("No data returned from API.")
 
-    df = pd.DataFrame(data['Data']['Data'])
-    df['time'] = pd.to_datetime(df['time'], unit='s')  # Convert Unix time to datetime
-    df.set_index('time', inplace=True)
-    df.rename(columns={"close": "price"}, inplace=True)
-
-    # Handle interval logic
-    if interval == '1d':
-        df = df.resample('H').mean()  # Treat daily data as hourly to find best time of day
+    df = df[['close']].rename(columns={"close": "price"})
 
     print(f"CryptoCompare Data:\n{df.head()}")  # Debug print
 
     return df[['price']]
 
-def fetch_yfinance_data(ticker, interval, period):
-    period_map = {
-        '1d': '1d',
-        '5d': '5d',
-        '1mo': '1mo',
-        '3mo': '3mo',
-        '6mo': '6mo',
-        '1y': '1y',
-        '2y': '2y',
-        '5y': '5y',
-        '10y': '10y',
-        'ytd': 'ytd',
-        'max': 'max'
-    }
+YFINANCE_PERIOD_MAP = {
+    '1d': '1d',
+    '5d': '5d',
+    '1mo': '1mo',
+    '3mo': '3mo',
+    '6mo': '6mo',
+    '1y': '1y',
+    '2y': '2y',
+    '5y': '5y',
+    '10y': '10y',
+    'ytd': 'ytd',
+    'max': 'max'
+}
 
-    period = period_map.get(period, '5d')
-    data = yf.download(ticker, period=period, interval=interval)
+def _prepare_yfinance_prices(data, interval):
     if data.empty:
         raise Exception("No data returned from API.")
     
@@ -184,38 +116,158 @@ def fetch_yfinance_data(ticker, interval, period):
 
     return data
 
+def fetch_yfinance_data(ticker, interval, period, start=None):
+    period = YFINANCE_PERIOD_MAP.get(period, '5d')
+    data = cached_yfinance_download(ticker, interval=interval, period=period, start=start)
+    return _prepare_yfinance_prices(data, interval)
+
+# df may be a DataFrame or a PriceSeries with a 'price' column; it is only read
 def best_time_to_buy(df, interval):
     if df.empty:
         raise ValueError("DataFrame is empty. Cannot calculate the best time to buy.")
 
     if interval == '1d':
         if 'hour' not in df.columns:  # Check if hourly data is not available
-            return "N/A", df['price'].min()  # Return N/A if hourly granularity is not available
+            return "N/A", np.nanmin(df['price'])  # Return N/A if hourly granularity is not available
 
         df = df.resample('H').mean()  # Ensure data is hourly for daily interval data
         best_time = df['price'].idxmin()
         lowest_avg_price = df['price'].min()
         return f"{best_time.hour}:{best_time.minute:02}", lowest_avg_price
 
-    df['hour'] = df.index.hour
-    df['minute'] = df.index.minute
-    df = df.groupby(['hour', 'minute']).mean()  # Group by both hour and minute if available
-
-    avg_price_by_time = df['price']
+    # Average by minute of the day
+    avg_price_by_time = time_of_day_profile(df.index, df['price'], bucket_minutes=1)['mean']
     if avg_price_by_time.empty:
         raise ValueError("No price data available for calculating best time to buy.")
     
-    best_time = avg_price_by_time.idxmin()
+    best_time = bucket_time(avg_price_by_time.idxmin())
     lowest_avg_price = avg_price_by_time.min()
     
-    return f"{best_time[0]}:{best_time[1]:02}", lowest_avg_price
+    return f"{best_time.hour}:{best_time.minute:02}", lowest_avg_price
+
+def _profile_path(source, ticker, interval):
+    return os.path.join(PROFILE_DIR, source, ticker.replace('/', '_'), f"{interval}.npz")
+
+# Fold only the candles newer than the previous run into the persisted
+# minute-of-day profile, then pick the best time from the updated profile.
+# Candles are fetched from the last one ingested however long ago that was,
+# and the still-forming last candle is left for a later run, since rows at or
+# before last_timestamp are never ingested again.
+def best_time_to_buy_incremental(source, func, ticker, interval, period):
+    path = _profile_path(source, ticker, interval)
+    profile = RunningProfile.load(path, bucket_minutes=1)
+
+    df = func(ticker, interval, period, start=profile.last_timestamp)
+    now = pd.Timestamp(datetime.utcnow())
+    if df.index.tz is not None:
+        now = now.tz_localize('UTC')
+    closed = df.index + interval_length(interval) <= now
+    df = df[closed]
+    profile.update(df.index, df['price'])
+    profile.save(path)
+
+    avg_price_by_time = profile.to_frame()['mean']
+    if avg_price_by_time.empty:
+        raise ValueError("No price data available for calculating best time to buy.")
+
+    best_time = bucket_time(avg_price_by_time.idxmin())
+    return f"{best_time.hour}:{best_time.minute:02}", avg_price_by_time.min()
+
+def analyze_source(source, func, ticker, interval, period, incremental=False):
+    try:
+        if incremental and interval != '1d':
+            best_time, lowest_avg_price = best_time_to_buy_incremental(source, func, ticker, interval, period)
+        else:
+            best_time, lowest_avg_price = best_time_to_buy(func(ticker, interval, period), interval)
+        return {
+            'Ticker': ticker,
+            'Source': source,
+            'Best Time to Buy (Hour:Minute)': best_time,
+            'Lowest Average Price (USD)': f"{lowest_avg_price:.2f} USD"
+        }
+    except Exception as e:
+        return {
+            'Ticker': ticker,
+            'Source': source,
+            'Best Time to Buy (Hour:Minute)': 'Error',
+            'Lowest Average Price (USD)': str(e)
+        }
+
+# Start of an incremental batch download: far enough back for the ticker whose
+# saved profile is oldest, or the whole period if one has no profile yet
+def _batch_start(tickers, interval, period):
+    if interval == '1d':
+        return None
+    period_start = period_to_start(period, datetime.utcnow())
+    starts = []
+    for ticker in tickers:
+        start = RunningProfile.load(_profile_path('yfinance', ticker, interval), bucket_minutes=1).last_timestamp
+        if start is None:
+            start = period_start
+        if start is None:  # period is 'max'
+            return None
+        starts.append(pd.Timestamp(start))
+    return min(starts) if starts else None
+
+# Download every ticker from yfinance in batched multi-ticker requests, then
+# analyze each one
+def analyze_yfinance_batch(tickers, interval, period, incremental=False):
+    try:
+        period = YFINANCE_PERIOD_MAP.get(period, '5d')
+        downloads = cached_yfinance_download_many(tickers, interval=interval, period=period,
+                                                   start=_batch_start(tickers, interval, period) if incremental else None)
+    except Exception as e:
+        return [{
+            'Ticker': ticker,
+            'Source': 'yfinance',
+            'Best Time to Buy (Hour:Minute)': 'Error',
+            'Lowest Average Price (USD)': str(e)
+        } for ticker in tickers]
+
+    fetch = lambda ticker, interval, period, start=None: _prepare_yfinance_prices(downloads[ticker], interval)
+    return [analyze_source('yfinance', fetch, ticker, interval, period, incremental) for ticker in tickers]
+
+# Run tasks (callables returning lists of result rows) on a bounded set of daemon
+# threads and return the rows of every task that finished before the deadline,
+# plus whether any task was still running. A task left running may hold worker
+# threads of its own (the fetchers' page pools, which Python joins at exit), so
+# the caller has to leave with os._exit to not wait for a hung request.
+def run_concurrently(tasks, workers, timeout):
+    pending = queue.Queue()
+    for task in tasks:
+        pending.put(task)
+
+    rows = []
+
+    def worker():
+        while True:
+            try:
+                task = pending.get_nowait()
+            except queue.Empty:
+                return
+            rows.extend(task())
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(min(workers, len(tasks)))]
+    for thread in threads:
+        thread.start()
+
+    deadline = time.monotonic() + timeout
+    for thread in threads:
+        thread.join(max(0, deadline - time.monotonic()))
+
+    return list(rows), any(thread.is_alive() for thread in threads)
 
 def main():
     parser = argparse.ArgumentParser(description="Find the best time to buy cryptocurrency.")
     parser.add_argument('--source', choices=['yfinance', 'coinbase', 'coingecko', 'cryptocompare', 'all'], required=True, help='Data source')
     parser.add_argument('--ticker', type=str, default='BTC-USD', help='Cryptocurrency ticker symbol')
+    parser.add_argument('--tickers', nargs='+', help='Analyze several ticker symbols and print one combined table')
+    parser.add_argument('--tickers-file', type=str, help='File with one ticker symbol per line (# starts a comment)')
+    parser.add_argument('--workers', type=int, default=8, help='Number of concurrent fetches (default: 8)')
     parser.add_argument('--period', type=str, default='5d', help='Time period for the data (e.g., 5d, 1mo)')
     parser.add_argument('--interval', type=str, default='1d', help='Data interval (e.g., 1m, 5m, 15m, 30m, 60m, 1d)')
+    parser.add_argument('--timeout', type=float, default=60, help='Seconds to wait for each source (default: 60)')
+    parser.add_argument('--incremental', action='store_true', help='Update a saved time-of-day profile with only the candles since the last run (intraday intervals)')
     args = parser.parse_args()
 
     sources = {
@@ -225,57 +277,55 @@ def main():
         'cryptocompare': fetch_cryptocompare_data
     }
 
-    results = []
-
-    if args.source == 'all':
-        for source, func in sources.items():
-            print(f"Fetching data from {source} with parameters:")
-            print(f"  Ticker: {args.ticker}")
-            print(f"  Interval: {args.interval}")
-            print(f"  Period: {args.period}")
-
-            try:
-                df = func(args.ticker, args.interval, args.period)
-                best_time, lowest_avg_price = best_time_to_buy(df, args.interval)
-                results.append({
-                    'Source': source,
-                    'Best Time to Buy (Hour:Minute)': best_time,
-                    'Lowest Average Price (USD)': f"{lowest_avg_price:.2f} USD"
-                })
-            except Exception as e:
-                results.append({
-                    'Source': source,
-                    'Best Time to Buy (Hour:Minute)': 'Error',
-                    'Lowest Average Price (USD)': str(e)
-                })
-
-    else:
-        print(f"Fetching data from {args.source} with parameters:")
-        print(f"  Ticker: {args.ticker}")
-        print(f"  Interval: {args.interval}")
-        print(f"  Period: {args.period}")
-
-        try:
-            df = sources[args.source](args.ticker, args.interval, args.period)
-            best_time, lowest_avg_price = best_time_to_buy(df, args.interval)
-            results.append({
-                'Source': args.source,
-                'Best Time to Buy (Hour:Minute)': best_time,
-                'Lowest Average Price (USD)': f"{lowest_avg_price:.2f} USD"
-            })
-        except Exception as e:
-            results.append({
-                'Source': args.source,
-                'Best Time to Buy (Hour:Minute)': 'Error',
-                'Lowest Average Price (USD)': str(e)
-            })
+    batch = bool(args.tickers or args.tickers_file)
+    tickers = read_tickers(args) if batch else [args.ticker]
+    selected = list(sources) if args.source == 'all' else [args.source]
+
+    print(f"Fetching data from {', '.join(selected)} with parameters:")
+    print(f"  Ticker: {', '.join(tickers)}")
+    print(f"  Interval: {args.interval}")
+    print(f"  Period: {args.period}")
+
+    tasks = []
+    for source in selected:
+        if source == 'yfinance' and batch:
+            tasks.append(lambda: analyze_yfinance_batch(tickers, args.interval, args.period, args.incremental))
+            continue
+        for ticker in tickers:
+            tasks.append(lambda source=source, ticker=ticker:
+                         [analyze_source(source, sources[source], ticker, args.interval, args.period, args.incremental)])
+
+    workers = max(1, args.workers) if batch else len(tasks)
+    waves = -(-len(tasks) // workers)
+    rows, timed_out = run_concurrently(tasks, workers, args.timeout * waves)
+
+    finished = {(row['Ticker'], row['Source']): row for row in rows}
+    results = [finished.get((ticker, source), {
+        'Ticker': ticker,
+        'Source': source,
+        'Best Time to Buy (Hour:Minute)': 'Error',
+        'Lowest Average Price (USD)': f"Timed out after {args.timeout:g}s"
+    }) for ticker in tickers for source in selected]
+
+    columns = ["Source", "Best Time to Buy (Hour:Minute)", "Lowest Average Price (USD)"]
+    if batch:
+        columns.insert(0, "Ticker")
+
+    from prettytable import PrettyTable
 
     table = PrettyTable()
-    table.field_names = ["Source", "Best Time to Buy (Hour:Minute)", "Lowest Average Price (USD)"]
+    table.field_names = columns
     for result in results:
-        table.add_row([result['Source'], result['Best Time to Buy (Hour:Minute)'], result['Lowest Average Price (USD)']])
+        table.add_row([result[column] for column in columns])
 
     print(table)
 
+    # Do not wait for requests that are still hanging past the deadline, and
+    # exit with a failure status since their results are missing
+    if timed_out:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(1)
+
 if __name__ == '__main__':
     main()
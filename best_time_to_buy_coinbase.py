@@ -1,66 +1,31 @@
-import requests
-import pandas as pd
 import argparse
-from datetime import datetime, timedelta
+from datetime import datetime
+from coinbase_candles import GRANULARITY_MAP, fetch_candles
+from seasonality import bucket_time, time_of_day_profile
+from ohlcv_cache import cached_fetch, period_to_start
 
 def fetch_intraday_data(ticker, interval, period):
-    base_url = "https://api.pro.coinbase.com"
     end_time = datetime.utcnow()
-    start_time = end_time - timedelta(days=int(period[:-1]))
+    start_time = period_to_start(period, end_time)
+    granularity = GRANULARITY_MAP.get(interval, 300)
 
-    granularity_map = {
-        '1m': 60,
-        '5m': 300,
-        '15m': 900,
-        '30m': 1800,
-        '60m': 3600,
-        '6h': 21600,
-        '1d': 86400
-    }
-    
-    granularity = granularity_map.get(interval, 300)
-
-    # Ensure granularity and period combination does not exceed 300 data points
-    total_seconds = (end_time - start_time).total_seconds()
-    max_data_points = 300
-    
-    while total_seconds / granularity > max_data_points:
-        interval, granularity = next((k, v) for k, v in granularity_map.items() if v > granularity)
-    
-    url = f"{base_url}/products/{ticker}/candles"
-    params = {
-        'start': start_time.isoformat(),
-        'end': end_time.isoformat(),
-        'granularity': granularity
-    }
+    df = cached_fetch('coinbase', ticker, interval, start_time, end_time,
+                      lambda start, end: fetch_candles(ticker, granularity, start, end))
 
-    response = requests.get(url, params=params)
-    if response.status_code != 200:
-        raise Exception(f"Error fetching data: {response.status_code} - {response.text}")
-
-    data = response.json()
-
-    if not data:
+    if df.empty:
         raise Exception("No data returned from API.")
-
-    df = pd.DataFrame(data, columns=['time', 'low', 'high', 'open', 'close', 'volume'])
-    df['time'] = pd.to_datetime(df['time'], unit='s')
-    df.set_index('time', inplace=True)
     
     return df
 
 def best_time_to_buy(data):
-    # Extract time of day from the index
-    data['Time'] = data.index.time
-
-    # Group by time of day and calculate the average close price
-    avg_price_by_time = data.groupby('Time')['close'].mean()
+    # Average the close price by minute of the day
+    avg_price_by_time = time_of_day_profile(data.index, data['close'], bucket_minutes=1)['mean']
 
     if avg_price_by_time.empty:
         raise Exception("No average price data available to determine the best time to buy.")
 
     # Find the time of day with the lowest average close price
-    best_time = avg_price_by_time.idxmin()
+    best_time = bucket_time(avg_price_by_time.idxmin())
     lowest_avg_price = avg_price_by_time.min()
 
     return best_time, lowest_avg_price
@@ -1,65 +1,40 @@
-import requests
-import pandas as pd
+import http_client
 import argparse
-from datetime import datetime, timedelta
+from datetime import datetime
+from seasonality import bucket_time, time_of_day_profile
+from ohlcv_cache import cached_fetch, period_to_start
+from providers import COINGECKO_URL, coingecko_prices_frame
 
-def fetch_intraday_data(ticker, interval, period):
-    base_url = "https://api.coingecko.com/api/v3"
-    end_date = datetime.utcnow()
-    start_date = end_date - timedelta(days=int(period[:-1]))
-
-    url = f"{base_url}/coins/{ticker}/market_chart/range"
+def _fetch_prices(ticker, interval, start_date, end_date):
+    url = f"{COINGECKO_URL}/coins/{ticker}/market_chart/range"
     params = {
         'vs_currency': 'usd',
         'from': int(start_date.timestamp()),
         'to': int(end_date.timestamp())
     }
 
-    response = requests.get(url, params=params)
+    response = http_client.get(url, params=params)
     if response.status_code != 200:
         raise Exception(f"Error fetching data: {response.status_code} - {response.text}")
 
-    data = response.json()
-
-    if 'prices' not in data:
-        raise Exception("No price data returned from API.")
+    return coingecko_prices_frame(response.json(), interval)
 
-    prices = data['prices']
-    df = pd.DataFrame(prices, columns=['time', 'price'])
-    df['time'] = pd.to_datetime(df['time'], unit='ms')
-    df.set_index('time', inplace=True)
-
-    # Resample to the specified interval
-    if interval == '1m':
-        df = df.resample('1T').mean()
-    elif interval == '5m':
-        df = df.resample('5T').mean()
-    elif interval == '15m':
-        df = df.resample('15T').mean()
-    elif interval == '30m':
-        df = df.resample('30T').mean()
-    elif interval == '60m':
-        df = df.resample('H').mean()
-    elif interval == '1d':
-        df = df.resample('D').mean()
-    else:
-        raise ValueError(f"Unsupported interval: {interval}")
+def fetch_intraday_data(ticker, interval, period):
+    end_date = datetime.utcnow()
+    start_date = period_to_start(period, end_date)
 
-    df.dropna(inplace=True)
-    return df
+    return cached_fetch('coingecko', ticker, interval, start_date, end_date,
+                        lambda start, end: _fetch_prices(ticker, interval, start, end))
 
 def best_time_to_buy(data):
-    # Extract time of day from the index
-    data['Time'] = data.index.time
-
-    # Group by time of day and calculate the average price
-    avg_price_by_time = data.groupby('Time')['price'].mean()
+    # Average the price by minute of the day
+    avg_price_by_time = time_of_day_profile(data.index, data['price'], bucket_minutes=1)['mean']
 
     if avg_price_by_time.empty:
         raise Exception("No average price data available to determine the best time to buy.")
 
     # Find the time of day with the lowest average price
-    best_time = avg_price_by_time.idxmin()
+    best_time = bucket_time(avg_price_by_time.idxmin())
     lowest_avg_price = avg_price_by_time.min()
 
     return best_time, lowest_avg_price
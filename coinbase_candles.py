@@ -0,0 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import os
+import pandas as pd
+import http_client
+
+API_URL = "https://api.pro.coinbase.com"
+# PREDICTORS_COINBASE_URL points the fetchers elsewhere, e.g. at replay_server.py
+BASE_URL = os.environ.get('PREDICTORS_COINBASE_URL', API_URL).rstrip('/')
+MAX_CANDLES_PER_REQUEST = 300
+
+GRANULARITY_MAP = {
+    '1m': 60,
+    '5m': 300,
+    '15m': 900,
+    '30m': 1800,
+    '60m': 3600,
+    '6h': 21600,
+    '1d': 86400
+}
+
+# Split [start_time, end_time) into windows of at most 300 candles
+def candle_windows(start_time, end_time, granularity):
+    step = timedelta(seconds=granularity * MAX_CANDLES_PER_REQUEST)
+    windows = []
+    window_start = start_time
+    while window_start < end_time:
+        window_end = min(window_start + step, end_time)
+        windows.append((window_start, window_end))
+        window_start = window_end
+    return windows
+
+def _fetch_window(ticker, granularity, start_time, end_time, base_url):
+    url = f"{base_url}/products/{ticker}/candles"
+    params = {
+        'start': start_time.isoformat(),
+        'end': end_time.isoformat(),
+        'granularity': granularity
+    }
+
+    response = http_client.get(url, params=params)
+    if response.status_code != 200:
+        raise Exception(f"Error fetching data: {response.status_code} - {response.text}")
+    return response.json()
+
+# Fetch full-resolution candles for any range by issuing the 300-candle windows
+# concurrently (paced by http_client's Coinbase rate limit), then merging them
+# into one sorted, de-duplicated frame
+def fetch_candles(ticker, granularity, start_time, end_time, max_workers=4, base_url=BASE_URL):
+    windows = candle_windows(start_time, end_time, granularity)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pages = list(executor.map(lambda window: _fetch_window(ticker, granularity, *window, base_url), windows))
+
+    return candles_frame(pages)
+
+# Merge pages of raw [time, low, high, open, close, volume] rows
+def candles_frame(pages):
+    rows = [row for page in pages for row in page]
+    df = pd.DataFrame(rows, columns=['time', 'low', 'high', 'open', 'close', 'volume'])
+    df = df.drop_duplicates(subset='time', keep='last')
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+    df.set_index('time', inplace=True)
+    return df.sort_index()
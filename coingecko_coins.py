@@ -1,19 +1,167 @@
-import requests
+import argparse
+import json
+import os
+import threading
+import time
+import http_client
+from ohlcv_cache import CACHE_DIR
+
+API_URL = "https://api.coingecko.com/api/v3"
+# PREDICTORS_COINGECKO_URL points the fetchers elsewhere, e.g. at replay_server.py
+BASE_URL = os.environ.get('PREDICTORS_COINGECKO_URL', API_URL).rstrip('/')
+REGISTRY_PATH = os.path.join(os.path.dirname(CACHE_DIR), 'coingecko', 'coins.json')
+REGISTRY_TTL_HOURS = 24
+
+# Many coins share a symbol; these are the ones a bare symbol usually means
+PREFERRED_IDS = {
+    'btc': 'bitcoin',
+    'eth': 'ethereum',
+    'ltc': 'litecoin',
+    'xrp': 'ripple',
+    'bch': 'bitcoin-cash',
+    'ada': 'cardano',
+    'dot': 'polkadot',
+    'link': 'chainlink',
+    'doge': 'dogecoin',
+}
 
 # Function to fetch all available coins from CoinGecko
-def list_all_coins():
-    url = "https://api.coingecko.com/api/v3/coins/list"
-    response = requests.get(url)
-    
-    if response.status_code == 200:
-        coins = response.json()
-        print(f"Total coins available: {len(coins)}\n")
-        
-        # Print the list of coins (ID, Symbol, and Name)
+def fetch_all_coins():
+    response = http_client.get(f"{BASE_URL}/coins/list")
+    if response.status_code != 200:
+        raise Exception(f"Error: {response.status_code}, unable to fetch data from CoinGecko API")
+    return response.json()
+
+# The coin list with dictionaries keyed by id, lowercase symbol and lowercase
+# name, so resolving a ticker is a couple of hash lookups
+class CoinRegistry:
+    def __init__(self, coins):
+        self.coins = coins
+        self.by_id = {}
+        self.by_symbol = {}
+        self.by_name = {}
         for coin in coins:
+            self.by_id[coin['id']] = coin
+            self.by_symbol.setdefault(coin['symbol'].lower(), []).append(coin)
+            self.by_name.setdefault(coin['name'].lower(), []).append(coin)
+
+    def __len__(self):
+        return len(self.coins)
+
+    # Pick one coin for a symbol: the preferred id if there is one, else the
+    # shortest id (the original coin rather than its wrapped/bridged copies)
+    def _best(self, symbol, candidates):
+        preferred = PREFERRED_IDS.get(symbol)
+        if preferred in self.by_id:
+            return self.by_id[preferred]
+        return min(candidates, key=lambda coin: (len(coin['id']), coin['id']))
+
+    # Coin for an id, symbol, name or exchange ticker such as XYZ-USD
+    def lookup(self, query):
+        query = query.strip()
+        if query in self.by_id:
+            return self.by_id[query]
+        key = query.lower()
+        for suffix in ('-usd', '/usd', '-usdt', '/usdt'):
+            if key.endswith(suffix):
+                key = key[:-len(suffix)]
+                break
+        if key in self.by_id:
+            return self.by_id[key]
+        if key in self.by_symbol:
+            return self._best(key, self.by_symbol[key])
+        if key in self.by_name:
+            return self._best(key, self.by_name[key])
+        return None
+
+    def coin_id(self, ticker):
+        coin = self.lookup(ticker)
+        if coin is None:
+            raise ValueError(f"Unknown ticker symbol: {ticker}")
+        return coin['id']
+
+    # Coins whose id, symbol or name contains the text, exact matches first
+    def search(self, text, limit=20):
+        text = text.strip().lower()
+        exact = [self.by_id[text]] if text in self.by_id else []
+        exact += self.by_symbol.get(text, []) + self.by_name.get(text, [])
+        exact = list({coin['id']: coin for coin in exact}.values())
+        seen = {coin['id'] for coin in exact}
+        partial = [coin for coin in self.coins
+                   if coin['id'] not in seen and (text in coin['id'] or text in coin['symbol'].lower() or text in coin['name'].lower())]
+        return (exact + partial)[:limit]
+
+_registry = None
+_registry_lock = threading.Lock()
+
+# Coin registry from the local copy, downloading a fresh list when the copy is
+# older than ttl_hours (or missing). A stale copy is still used if the download
+# fails. The registry is kept in memory for the rest of the process.
+def load_registry(ttl_hours=REGISTRY_TTL_HOURS, refresh=False):
+    global _registry
+    with _registry_lock:
+        if _registry is not None and not refresh:
+            return _registry
+
+        fresh = os.path.exists(REGISTRY_PATH) and time.time() - os.path.getmtime(REGISTRY_PATH) < ttl_hours * 3600
+        coins = None
+        if refresh or not fresh:
+            try:
+                coins = fetch_all_coins()
+                os.makedirs(os.path.dirname(REGISTRY_PATH), exist_ok=True)
+                tmp_path = f"{REGISTRY_PATH}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(coins, f)
+                os.replace(tmp_path, REGISTRY_PATH)
+            except Exception:
+                if not os.path.exists(REGISTRY_PATH):
+                    raise
+        if coins is None:
+            with open(REGISTRY_PATH) as f:
+                coins = json.load(f)
+
+        _registry = CoinRegistry(coins)
+        return _registry
+
+def coingecko_id(ticker):
+    return load_registry().coin_id(ticker)
+
+# Function to print all available coins from CoinGecko
+def list_all_coins():
+    registry = load_registry()
+    print(f"Total coins available: {len(registry)}\n")
+
+    # Print the list of coins (ID, Symbol, and Name)
+    for coin in registry.coins:
+        print(f"ID: {coin['id']}, Symbol: {coin['symbol']}, Name: {coin['name']}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Search the cached CoinGecko coin list.')
+    parser.add_argument('query', nargs='?', help='Text to search for in coin ids, symbols and names')
+    parser.add_argument('--resolve', type=str, help='Show the coin a ticker such as XYZ-USD maps to')
+    parser.add_argument('--limit', type=int, default=20, help='Maximum number of search results (default: 20)')
+    parser.add_argument('--refresh', action='store_true', help='Download the coin list even if the local copy is fresh')
+    parser.add_argument('--all', action='store_true', help='Print every coin')
+
+    args = parser.parse_args()
+
+    registry = load_registry(refresh=args.refresh)
+    if args.all:
+        list_all_coins()
+    elif args.resolve:
+        coin = registry.lookup(args.resolve)
+        if coin is None:
+            print(f"No coin found for {args.resolve}")
+        else:
+            print(f"{args.resolve} -> ID: {coin['id']}, Symbol: {coin['symbol']}, Name: {coin['name']}")
+    elif args.query:
+        matches = registry.search(args.query, args.limit)
+        for coin in matches:
             print(f"ID: {coin['id']}, Symbol: {coin['symbol']}, Name: {coin['name']}")
+        if not matches:
+            print(f"No coins match {args.query}")
     else:
-        print(f"Error: {response.status_code}, unable to fetch data from CoinGecko API")
+        print(f"{len(registry)} coins cached in {REGISTRY_PATH}; pass a search term, --resolve TICKER or --all")
 
 if __name__ == "__main__":
-    list_all_coins()
+    main()
@@ -1,16 +1,18 @@
-import yfinance as yf
 import pandas as pd
 import argparse
+from ohlcv_cache import cached_yfinance_download
+from seasonality import time_of_day_profile
+from dca_backtest import LadderBacktest, first_crossing, summarize_orders
 from datetime import datetime
 from collections import defaultdict
 
 def fetch_yfinance_data(ticker, period, interval):
-    df = yf.download(ticker, period=period, interval=interval)
+    df = cached_yfinance_download(ticker, interval=interval, period=period)
     df.index = pd.to_datetime(df.index)
     return df
 
 def find_optimal_time(df):
-    avg_prices_by_hour = df.groupby(df.index.hour)['Close'].mean()
+    avg_prices_by_hour = time_of_day_profile(df.index, df['Close'], bucket_minutes=60)['mean']
     optimal_hour = avg_prices_by_hour.idxmin()
     return optimal_hour
 
@@ -24,10 +26,11 @@ def simulate_dca_strategy(df, price_levels, amounts):
     orders = [(base_price * (1 - level / 100), amount) for level, amount in zip(price_levels, amounts)]
     fulfilled_orders = defaultdict(float)
 
-    for price, amount in orders:
-        fulfilled = df[df['Close'] <= price]
-        if not fulfilled.empty:
-            fulfilled_orders[fulfilled.index[0]] += amount / fulfilled['Close'].iloc[0]
+    close = df['Close'].to_numpy()
+    first_fills = first_crossing(close, [price for price, amount in orders])
+    for (price, amount), index in zip(orders, first_fills):
+        if index >= 0:
+            fulfilled_orders[df.index[index]] += amount / close[index]
 
     return fulfilled_orders
 
@@ -39,6 +42,9 @@ def main():
     parser.add_argument('--price_levels', nargs='+', type=float, default=[0.01, 1, 2, 3, 4], help='Price levels below market price for placing orders (default: [0.01, 1, 2, 3, 4])')
     parser.add_argument('--amounts', nargs='+', type=float, default=[100, 200, 300, 400, 500], help='USD amounts for each price level (default: [100, 200, 300, 400, 500])')
     
+    parser.add_argument('--backtest', action='store_true', help='Also backtest the ladder re-placed every day off the day\'s open, filling on the Low')
+    parser.add_argument('--ttl_hours', type=float, default=24, help='Hours before an unfilled backtest order expires (default: 24)')
+    
     args = parser.parse_args()
 
     df = fetch_yfinance_data(args.ticker, args.period, args.interval)
@@ -58,5 +64,14 @@ def main():
     for time, btc in fulfilled_orders.items():
         print(f"Time: {time}, BTC Purchased: {btc:.6f}")
 
+    if args.backtest:
+        orders = LadderBacktest(df).run(args.price_levels, args.amounts, ttl=pd.Timedelta(hours=args.ttl_hours))
+        summary = summarize_orders(orders)
+        print(f"\nDaily Ladder Backtest ({args.ttl_hours:g}h expiry):")
+        print(f"Orders Filled: {summary['filled']} of {summary['orders']} ({summary['fill_rate']:.1%})")
+        print(f"Total Invested: {summary['invested']:.2f} USD")
+        print(f"BTC Purchased: {summary['units']:.6f}")
+        print(f"Backtest Avg Price: {summary['avg_price']:.2f} USD")
+
 if __name__ == '__main__':
     main()
@@ -1,58 +1,66 @@
+import argparse
 import pandas as pd
 from datetime import datetime
+from price_series import load_series_for
+from purchase_schedules import compare_schedules, parse_schedule
 
-# Load BTC price data from a CSV file
-btc_data = pd.read_csv('btc_prices.csv', parse_dates=['Date'])
-btc_data.set_index('Date', inplace=True)
+# Load BTC price data, from the memory-mapped copy written by
+# yfinance_extractor.py when there is an up-to-date one, else from the CSV
+def load_prices(filename):
+    series = load_series_for(filename)
+    if series is not None:
+        return series.to_frame(index_name='Date')
+
+    btc_data = pd.read_csv(filename, parse_dates=['Date'])
+    btc_data.set_index('Date', inplace=True)
+    return btc_data
 
 # Function to calculate BTC accumulated for a given strategy
 def calculate_btc_accumulated(btc_data, amount_per_purchase, purchase_dates=None, strategy="daily"):
-    total_btc = 0
-    total_cost = 0
-
     if strategy == "daily":
         # Purchase every day
-        for date, price in btc_data['Close'].items():
-            total_btc += amount_per_purchase / price
-            total_cost += amount_per_purchase
+        schedule = parse_schedule(f"daily={amount_per_purchase}")
     elif strategy == "twice_per_month":
         # Purchase 15x the daily amount on 1st and 15th of each month
-        twice_amount = amount_per_purchase * 15
-        for date, price in btc_data['Close'].items():
-            if date.day == 1 or date.day == 15:
-                total_btc += twice_amount / price
-                total_cost += twice_amount
-
-    return total_btc, total_cost
-
-# Define parameters
-amount_per_purchase = 100  # The amount of USD to spend per daily purchase
-start_date = '2024-01-01'
-end_date = '2024-12-31'
-
-# Filter data for the selected date range
-btc_data = btc_data.loc[start_date:end_date]
+        schedule = parse_schedule(f"monthdays:1,15={amount_per_purchase * 15}")
+    else:
+        raise ValueError(f"Unknown strategy: {strategy}")
 
-# Calculate BTC accumulated with daily purchases
-btc_daily, cost_daily = calculate_btc_accumulated(btc_data, amount_per_purchase, strategy="daily")
+    result = compare_schedules(btc_data['Close'], [schedule]).iloc[0]
+    return result['units'], result['cost']
 
-# Calculate BTC accumulated with purchases on 1st and 15th (15x daily amount)
-btc_twice_per_month, cost_twice_per_month = calculate_btc_accumulated(btc_data, amount_per_purchase, strategy="twice_per_month")
+def main():
+    parser = argparse.ArgumentParser(description='Compare periodic purchase schedules over a price history.')
+    parser.add_argument('--csv', type=str, default='btc_prices.csv', help='CSV file with Date and Close columns (default: btc_prices.csv)')
+    parser.add_argument('--start_date', type=str, default='2024-01-01', help='First date to include (default: 2024-01-01)')
+    parser.add_argument('--end_date', type=str, default='2024-12-31', help='Last date to include (default: 2024-12-31)')
+    parser.add_argument('--amount', type=float, default=100, help='USD per daily purchase for the default schedules (default: 100)')
+    parser.add_argument('--schedule', action='append', metavar='SPEC',
+                        help='Schedule to compare, e.g. daily=100, weekly:mon@09:30=700, every:4h=20, monthdays:1,15=1500. '
+                             'Repeat to compare several (default: daily vs. 1st and 15th at 15x the daily amount)')
+    args = parser.parse_args()
 
-# Output results
-print(f"Daily Purchase Strategy:")
-print(f"Total BTC accumulated: {btc_daily:.8f}")
-print(f"Total cost spent: ${cost_daily:.2f}")
+    specs = args.schedule or [f"daily={args.amount:g}", f"monthdays:1,15={args.amount * 15:g}"]
+    schedules = [parse_schedule(spec) for spec in specs]
 
-print(f"\nTwice-Per-Month Purchase Strategy (15x daily amount):")
-print(f"Total BTC accumulated: {btc_twice_per_month:.8f}")
-print(f"Total cost spent: ${cost_twice_per_month:.2f}")
+    # Filter data for the selected date range
+    btc_data = load_prices(args.csv).loc[args.start_date:args.end_date]
 
-# Calculate and compare
-btc_difference = btc_daily - btc_twice_per_month
-cost_difference = cost_daily - cost_twice_per_month
+    results = compare_schedules(btc_data['Close'], schedules)
 
-print(f"\nDifference in BTC accumulated: {btc_difference:.8f}")
-print(f"Difference in total cost spent: ${cost_difference:.2f}")
+    # Output results
+    for _, result in results.iterrows():
+        print(f"{result['schedule']} ({result['purchases']} purchases):")
+        print(f"Total BTC accumulated: {result['units']:.8f}")
+        print(f"Total cost spent: ${result['cost']:.2f}")
+        print(f"Average price: ${result['avg_price']:.2f}\n")
 
+    # Compare every schedule with the first one
+    baseline = results.iloc[0]
+    for _, result in results.iloc[1:].iterrows():
+        print(f"{baseline['schedule']} vs. {result['schedule']}:")
+        print(f"Difference in BTC accumulated: {baseline['units'] - result['units']:.8f}")
+        print(f"Difference in total cost spent: ${baseline['cost'] - result['cost']:.2f}")
 
+if __name__ == '__main__':
+    main()
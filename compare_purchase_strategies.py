@@ -1,13 +1,15 @@
-import yfinance as yf
 import pandas as pd
 import argparse
+from ohlcv_cache import cached_yfinance_download, cached_yfinance_download_many
+from seasonality import time_of_day_profile, walk_forward_hours
 
 VALID_PERIODS = ['1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y', 'ytd', 'max']
 VALID_INTERVALS = ['1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h', '1d', '5d', '1wk', '1mo', '3mo']
 MAX_DAYS = 730
+WALK_FORWARD_PERIODS = [('1mo', 30), ('3mo', 90), ('6mo', 180), ('1y', 365), ('2y', 730)]
 
 def fetch_yfinance_data(ticker, period='1mo', interval='1h'):
-    df = yf.download(ticker, period=period, interval=interval)
+    df = cached_yfinance_download(ticker, interval=interval, period=period)
     df.index = pd.to_datetime(df.index)
     return df
 
@@ -22,12 +24,30 @@ def calculate_avg_price_multiple_purchases(df):
     return avg_price_4hour
 
 def find_optimal_purchase_time(df):
-    df['Hour'] = df.index.hour
-    avg_price_by_hour = df.groupby('Hour')['Close'].mean()
+    avg_price_by_hour = time_of_day_profile(df.index, df['Close'], bucket_minutes=60)['mean']
     optimal_hour = avg_price_by_hour.idxmin()
     optimal_price = avg_price_by_hour.min()
     return optimal_hour, optimal_price
 
+# Out-of-sample comparison: the hour picked on each training window is bought on
+# the following test window, against buying every 4 hours on that same window
+def walk_forward_comparison(df, train_days=30, test_days=7):
+    windows = walk_forward_hours(df.index, df['Close'], train_days, test_days)
+    windows = windows.dropna(subset=['avg_price_best_hour', 'avg_price_every_4_hours'])
+    return windows, {
+        'windows': len(windows),
+        'avg_price_best_hour': windows['avg_price_best_hour'].mean(),
+        'avg_price_every_4_hours': windows['avg_price_every_4_hours'].mean(),
+        'best_hour_win_rate': (windows['avg_price_best_hour'] < windows['avg_price_every_4_hours']).mean(),
+    }
+
+# Shortest period holding at least one training window plus one test window
+def walk_forward_period(train_days, test_days):
+    for period, days in WALK_FORWARD_PERIODS:
+        if days > train_days + test_days:
+            return period
+    return WALK_FORWARD_PERIODS[-1][0]
+
 def validate_period(period):
     if period == '1d':
         days = 1
@@ -60,10 +80,16 @@ def validate_interval(interval):
 def main():
     parser = argparse.ArgumentParser(description='Compare purchase strategies for a given ticker.')
     parser.add_argument('--ticker', type=str, default='BTC-USD', help='Ticker symbol (default: BTC-USD)')
-    parser.add_argument('--period', type=str, choices=VALID_PERIODS, default='1mo', help='Data period (default: 1mo)')
+    parser.add_argument('--period', type=str, choices=VALID_PERIODS, help='Data period (default: 1mo, or with --walk_forward the shortest covering one training and one test window)')
     parser.add_argument('--interval', type=str, choices=VALID_INTERVALS, default='1h', help='Data interval (default: 1h)')
+    parser.add_argument('--walk_forward', action='store_true', help='Pick the hour on a rolling training window and evaluate it on the next window')
+    parser.add_argument('--train_days', type=int, default=30, help='Training window in days for --walk_forward (default: 30)')
+    parser.add_argument('--test_days', type=int, default=7, help='Test window in days for --walk_forward (default: 7)')
+    parser.add_argument('--tickers', nargs='+', help='Evaluate several tickers with --walk_forward')
     
     args = parser.parse_args()
+    if args.period is None:
+        args.period = walk_forward_period(args.train_days, args.test_days) if args.walk_forward else '1mo'
     
     try:
         validated_period = validate_period(args.period)
@@ -71,15 +97,39 @@ def main():
     except ValueError as e:
         print(e)
         return
+
+    if args.walk_forward:
+        tickers = args.tickers or [args.ticker]
+        print(f"Fetching historical data for {', '.join(tickers)} for the past {validated_period} with {validated_interval} interval.")
+        data = cached_yfinance_download_many(tickers, interval=validated_interval, period=validated_period)
+
+        print(f"\nWalk-forward comparison ({args.train_days}-day training, {args.test_days}-day test windows):")
+        for ticker in tickers:
+            df = data.get(ticker)
+            if df is None or df.empty:
+                print(f"{ticker}: no data fetched.")
+                continue
+            try:
+                windows, summary = walk_forward_comparison(df, args.train_days, args.test_days)
+            except ValueError as e:
+                print(f"{ticker}: {e}")
+                continue
+            print(f"{ticker}: {summary['windows']} windows, "
+                  f"Avg Price at Chosen Hour: {summary['avg_price_best_hour']:.2f} USD, "
+                  f"Avg Price Every 4 Hours: {summary['avg_price_every_4_hours']:.2f} USD, "
+                  f"Chosen Hour Cheaper in {summary['best_hour_win_rate']:.0%} of Windows")
+        return
     
     print(f"Fetching historical data for {args.ticker} for the past {validated_period} with {validated_interval} interval.")
     df = fetch_yfinance_data(args.ticker, validated_period, validated_interval)
     
     print(f"Data fetched. First few rows:\n{df.head()}")
 
-    avg_price_at_optimal_time = calculate_avg_price_at_time(df, find_optimal_purchase_time(df)[0])
-    avg_price_4hour = calculate_avg_price_multiple_purchases(df)
+    # Note: the hour is chosen on the same data it is evaluated on; use
+    # --walk_forward for an out-of-sample comparison
     optimal_hour, optimal_price = find_optimal_purchase_time(df)
+    avg_price_at_optimal_time = calculate_avg_price_at_time(df, optimal_hour)
+    avg_price_4hour = calculate_avg_price_multiple_purchases(df)
     
     print("\nComparison of Strategies:")
     print(f"Average Price for Single Purchase at Optimal Time ({optimal_hour}:00): {avg_price_at_optimal_time:.2f} USD")
@@ -0,0 +1,98 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+import pandas as pd
+import http_client
+
+API_URL = "https://min-api.cryptocompare.com/data/v2"
+# PREDICTORS_CRYPTOCOMPARE_URL points the fetchers elsewhere, e.g. at replay_server.py
+BASE_URL = os.environ.get('PREDICTORS_CRYPTOCOMPARE_URL', API_URL).rstrip('/')
+MAX_BARS_PER_REQUEST = 2000
+
+# Endpoint, seconds per base bar and aggregate factor for every interval.
+# Note the free tier only serves about a week of histominute data.
+ENDPOINT_MAP = {
+    '1m': ('histominute', 60, 1),
+    '5m': ('histominute', 60, 5),
+    '15m': ('histominute', 60, 15),
+    '30m': ('histominute', 60, 30),
+    '60m': ('histohour', 3600, 1),
+    '1h': ('histohour', 3600, 1),
+    '6h': ('histohour', 3600, 6),
+    '1d': ('histoday', 86400, 1),
+}
+
+def endpoint_for(interval):
+    if interval not in ENDPOINT_MAP:
+        raise ValueError(f"Unsupported interval: {interval}")
+    return ENDPOINT_MAP[interval]
+
+# Request parameters of every page covering [start_time, end_time), newest
+# first. Each page ends one bar before the next newer one starts, so the toTs
+# of every page is known up front and the pages can be fetched concurrently
+# instead of walking back one response at a time. Naive times are taken as
+# UTC. Without a start only the newest page is requested.
+def page_params(ticker, interval, start_time, end_time):
+    endpoint, seconds, aggregate = endpoint_for(interval)
+    bar_seconds = seconds * aggregate
+    last_bar = (int(pd.Timestamp(end_time).timestamp()) - 1) // bar_seconds * bar_seconds
+    if start_time is None:
+        total = MAX_BARS_PER_REQUEST // aggregate
+    else:
+        first_bar = -(-int(pd.Timestamp(start_time).timestamp()) // bar_seconds) * bar_seconds
+        total = max(1, (last_bar - first_bar) // bar_seconds + 1)
+
+    # The API cuts limit to 2000 / aggregate when limit * aggregate exceeds 2000
+    page_bars = MAX_BARS_PER_REQUEST // aggregate
+    pages = []
+    to_ts = last_bar
+    while total > 0:
+        bars = min(total, page_bars)
+        pages.append({
+            'fsym': ticker.split('-')[0],
+            'tsym': ticker.split('-')[1] if '-' in ticker else 'USD',
+            'limit': bars - 1,  # The API returns limit + 1 bars ending at toTs
+            'aggregate': aggregate,
+            'toTs': to_ts,
+        })
+        to_ts -= bars * bar_seconds
+        total -= bars
+    return endpoint, pages
+
+# Parse a histo* response into its rows indexed by time
+def candles_frame(data):
+    if 'Data' not in data:
+        raise Exception(f"No data returned from API: {data.get('Message', '')}")
+
+    df = pd.DataFrame(data['Data']['Data'])
+    if df.empty:
+        return df
+    df['time'] = pd.to_datetime(df['time'], unit='s')  # Convert Unix time to datetime
+    df.set_index('time', inplace=True)
+    return df
+
+# Merge parsed pages, dropping the all-zero bars returned for times before the
+# pair was listed, and keep [start_time, end_time)
+def merge_pages(frames, start_time, end_time):
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames).sort_index()
+    df = df[~df.index.duplicated(keep='last')]
+    df = df[df['close'] != 0]
+    if start_time is not None:
+        df = df[df.index >= pd.Timestamp(start_time)]
+    return df[df.index < pd.Timestamp(end_time)]
+
+def _fetch_page(endpoint, params, base_url):
+    response = http_client.get(f"{base_url}/{endpoint}", params=params)
+    if response.status_code != 200:
+        raise Exception(f"Error fetching data: {response.status_code} - {response.text}")
+    return candles_frame(response.json())
+
+# Fetch candles at the interval's native resolution for any range, issuing the
+# 2000-bar pages concurrently (paced by http_client's CryptoCompare rate limit)
+def fetch_candles(ticker, interval, start_time, end_time, max_workers=4, base_url=BASE_URL):
+    endpoint, pages = page_params(ticker, interval, start_time, end_time)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        frames = list(executor.map(lambda params: _fetch_page(endpoint, params, base_url), pages))
+    return merge_pages(frames, start_time, end_time)
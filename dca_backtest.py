@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+# Index of the first value <= each threshold, or -1 if none is. The running
+# minimum is non-increasing, so every threshold is one binary search instead of
+# a scan of the whole series. NaN values never cross (they are taken as +inf so
+# the running minimum does not carry them forward).
+def first_crossing(values, thresholds):
+    values = np.asarray(values, dtype=np.float64)
+    running_min = np.minimum.accumulate(np.where(np.isnan(values), np.inf, values))
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    index = np.searchsorted(-running_min, -thresholds, side='left')
+    return np.where(index < len(running_min), index, -1)
+
+# Backtest of a ladder of limit orders re-placed at the start of every period.
+# Orders are priced off the period's opening price, fill on the first bar whose
+# Low reaches the limit (at the limit, or at the bar's Open if it gapped below),
+# and expire unfilled after ttl.
+#
+# The price series is prepared once so many ladders can be evaluated against
+# it. Per period the running minimum of Low is folded into one globally
+# non-decreasing key array, which turns every order's first-crossing search
+# into a single np.searchsorted over all orders at once.
+class LadderBacktest:
+    def __init__(self, df, period='1D', placement_offset='0h'):
+        low = df['Low'] if 'Low' in df.columns else df['Close']
+        opens = df['Open'] if 'Open' in df.columns else df['Close']
+        data = pd.DataFrame({'low': low, 'open': opens}).dropna()
+        if data.empty:
+            raise ValueError("No price data to backtest.")
+
+        times = pd.DatetimeIndex(data.index).as_unit('ns')
+        if times.tz is not None:
+            times = times.tz_convert('UTC').tz_localize(None)
+
+        self.period = pd.Timedelta(period)
+        self.origin = times[0].normalize() + pd.Timedelta(placement_offset)
+        keep = times >= self.origin
+        times, data = times[keep], data[keep]
+        if len(times) == 0:
+            raise ValueError("No price data after the first placement time.")
+
+        self.times = times
+        self.low = data['low'].to_numpy(dtype=np.float64)
+        self.open = data['open'].to_numpy(dtype=np.float64)
+
+        # Period number of every bar, and the bar that starts each period
+        period_ns = self.period.value
+        period_id = (times.asi8 - self.origin.value) // period_ns
+        starts = np.flatnonzero(np.r_[True, period_id[1:] != period_id[:-1]])
+        self.period_ids = period_id[starts]
+        self.starts = starts
+        self.ends = np.r_[starts[1:], len(times)]
+
+        # Per-period running max of (span - shifted low), stacked so each period
+        # sits above every earlier one: within a period it tracks the running
+        # minimum of Low, and across periods it never decreases
+        rank = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(times)]))
+        self.low_floor = self.low.min()
+        self.span = self.low.max() - self.low_floor + 1
+        self.stride = 2 * self.span
+        stacked = rank * self.stride + (self.span - (self.low - self.low_floor))
+        self.key = np.maximum.accumulate(stacked)
+
+    # First bar in each given period (by position in self.starts) whose running
+    # minimum Low is <= limit, or -1. A limit at or above every Low would aim
+    # below the period's keys, so the target is clamped to its smallest key.
+    def _first_fill_in_period(self, rank, limit):
+        target = rank * self.stride + self.span - (limit - self.low_floor)
+        target = np.maximum(target, rank * self.stride + 1)
+        index = np.searchsorted(self.key, target, side='left')
+        hit = index < self.ends[rank]
+        return np.where(hit, index, -1)
+
+    # Evaluate one ladder: levels are percentages below the opening price of
+    # each period, amounts the USD per order. Returns one row per order placed.
+    def run(self, levels, amounts, ttl='24h'):
+        levels = np.asarray(levels, dtype=np.float64)
+        amounts = np.broadcast_to(np.asarray(amounts, dtype=np.float64), levels.shape)
+        ttl = pd.Timedelta(ttl)
+
+        num_periods, num_levels = len(self.starts), len(levels)
+        rank = np.repeat(np.arange(num_periods), num_levels)
+        level = np.tile(levels, num_periods)
+        amount = np.tile(amounts, num_periods)
+        reference = self.open[self.starts][rank]
+        limit = reference * (1 - level / 100)
+
+        placed_at = self.origin.value + self.period.value * self.period_ids[rank]
+        window_end = np.searchsorted(self.times.asi8, placed_at + ttl.value, side='left')
+
+        # An order can stay open into later periods when ttl exceeds the period,
+        # so check each period it overlaps in turn until it fills
+        fill_index = np.full(len(rank), -1)
+        spans = max(1, int(np.ceil(ttl / self.period)))
+        for offset in range(spans):
+            pending = fill_index < 0
+            target_rank = rank + offset
+            in_range = pending & (target_rank < num_periods)
+            if not in_range.any():
+                break
+            candidate = np.full(len(rank), -1)
+            candidate[in_range] = self._first_fill_in_period(target_rank[in_range], limit[in_range])
+            valid = in_range & (candidate >= 0) & (candidate < window_end)
+            fill_index[valid] = candidate[valid]
+
+        filled = fill_index >= 0
+        safe_index = np.where(filled, fill_index, 0)
+        fill_price = np.where(filled, np.minimum(limit, self.open[safe_index]), np.nan)
+        units = np.where(filled, amount / np.where(filled, fill_price, 1), 0.0)
+
+        return pd.DataFrame({
+            'placed_at': pd.to_datetime(placed_at),
+            'level': level,
+            'limit_price': limit,
+            'amount': amount,
+            'filled': filled,
+            'filled_at': pd.to_datetime(np.where(filled, self.times.asi8[safe_index], np.iinfo(np.int64).min)),
+            'fill_price': fill_price,
+            'units': units,
+        })
+
+# Totals for the orders returned by LadderBacktest.run
+def summarize_orders(orders):
+    filled = orders[orders['filled']]
+    invested = filled['amount'].sum()
+    units = filled['units'].sum()
+    return {
+        'orders': len(orders),
+        'filled': len(filled),
+        'fill_rate': len(filled) / len(orders) if len(orders) else float('nan'),
+        'invested': invested,
+        'units': units,
+        'avg_price': invested / units if units else float('nan'),
+    }
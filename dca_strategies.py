@@ -1,6 +1,9 @@
-import yfinance as yf
+import numpy as np
 import pandas as pd
 import argparse
+from ohlcv_cache import cached_yfinance_download
+from dca_backtest import LadderBacktest, first_crossing, summarize_orders
+from price_series import PriceSeries
 from datetime import datetime
 
 VALID_PERIODS = ['1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y', 'ytd', 'max']
@@ -8,19 +11,22 @@ VALID_INTERVALS = ['1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h', '1d', '5d
 
 # Fetch historical data
 def fetch_yfinance_data(ticker, period, interval):
-    df = yf.download(ticker, period=period, interval=interval)
+    df = cached_yfinance_download(ticker, interval=interval, period=period)
     df.index = pd.to_datetime(df.index)
     return df
 
 # Calculate optimal buy levels based on historical dips
 def calculate_optimal_dca_levels(df, num_levels=5):
-    # Calculate daily percentage drops from the high of the day
-    df['High'] = df['High'].shift(1)  # Shift high price to previous day
-    df['Drop'] = (df['High'] - df['Low']) / df['High'] * 100  # Calculate drop percentage
-    df = df.dropna()  # Drop NA values
+    # Calculate daily percentage drops from the previous bar's high, reading the
+    # columns without modifying them (works on a DataFrame or a PriceSeries)
+    high = np.asarray(df['High'], dtype=np.float64)
+    low = np.asarray(df['Low'], dtype=np.float64)
+    previous_high = high[:-1]
+    drop = (previous_high - low[1:]) / previous_high * 100
+    drop = drop[~np.isnan(drop)]  # Drop NA values
 
     # Get the most frequent drop levels
-    drop_percentiles = [df['Drop'].quantile(i / num_levels) for i in range(1, num_levels + 1)]
+    drop_percentiles = [np.quantile(drop, i / num_levels) for i in range(1, num_levels + 1)]
     return drop_percentiles
 
 # Simulate aggressive DCA strategy
@@ -30,10 +36,11 @@ def simulate_dca_strategy(df, drop_levels, daily_amount):
 
     fulfilled_orders = []
 
-    for price, amount in orders:
-        fulfilled = df[df['Close'] <= price]
-        if not fulfilled.empty:
-            fulfilled_orders.append((fulfilled.index[0], amount / fulfilled['Close'].iloc[0]))
+    close = df['Close'].to_numpy()
+    first_fills = first_crossing(close, [price for price, amount in orders])
+    for (price, amount), index in zip(orders, first_fills):
+        if index >= 0:
+            fulfilled_orders.append((df.index[index], amount / close[index]))
 
     total_invested = daily_amount * len(drop_levels)
     total_btc_purchased = sum([btc for time, btc in fulfilled_orders])
@@ -49,6 +56,8 @@ def main():
     parser.add_argument('--interval', type=str, choices=VALID_INTERVALS, default='1h', help='Data interval (default: 1h)')
     parser.add_argument('--daily_amount', type=float, default=250, help='Daily amount in USD to invest (default: 250)')
     parser.add_argument('--num_levels', type=int, default=5, help='Number of DCA levels (default: 5)')
+    parser.add_argument('--backtest', action='store_true', help='Also backtest the levels as a ladder re-placed every day off the day\'s open, filling on the Low')
+    parser.add_argument('--ttl_hours', type=float, default=24, help='Hours before an unfilled backtest order expires (default: 24)')
 
     args = parser.parse_args()
 
@@ -57,7 +66,8 @@ def main():
         raise ValueError("Invalid period. Choose from: " + ", ".join(VALID_PERIODS))
 
     df = fetch_yfinance_data(args.ticker, args.period, args.interval)
-    drop_levels = calculate_optimal_dca_levels(df, args.num_levels)
+    series = PriceSeries.from_frame(df, columns=['High', 'Low', 'Close'])
+    drop_levels = calculate_optimal_dca_levels(series, args.num_levels)
     fulfilled_orders, avg_price_dca = simulate_dca_strategy(df, drop_levels, args.daily_amount)
 
     # Calculate amounts for each order
@@ -74,5 +84,14 @@ def main():
     for time, btc in fulfilled_orders:
         print(f"Time: {time}, BTC Purchased: {btc:.6f}")
 
+    if args.backtest:
+        orders = LadderBacktest(df).run(drop_levels, order_amounts, ttl=pd.Timedelta(hours=args.ttl_hours))
+        summary = summarize_orders(orders)
+        print(f"\nDaily Ladder Backtest ({args.ttl_hours:g}h expiry):")
+        print(f"Orders Filled: {summary['filled']} of {summary['orders']} ({summary['fill_rate']:.1%})")
+        print(f"Total Invested: {summary['invested']:.2f} USD")
+        print(f"BTC Purchased: {summary['units']:.6f}")
+        print(f"Backtest Avg Price: {summary['avg_price']:.2f} USD")
+
 if __name__ == '__main__':
     main()
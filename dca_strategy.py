@@ -1,14 +1,14 @@
 import argparse
 from datetime import datetime, timedelta
-import yfinance as yf
 import pandas as pd
 from pandas.tseries.offsets import DateOffset
+from ohlcv_cache import cached_yfinance_download
 
 VALID_PERIODS = ['1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y', 'ytd', 'max']
 VALID_INTERVALS = ['1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h', '1d', '5d', '1wk', '1mo', '3mo']
 
 def fetch_data(ticker, period, interval):
-    data = yf.download(ticker, period=period, interval=interval)
+    data = cached_yfinance_download(ticker, interval=interval, period=period)
     return data
 
 def calculate_avg_price_single_purchase(df, optimal_time):
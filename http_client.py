@@ -0,0 +1,190 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+# Requests per second and burst size allowed for each provider host
+RATE_LIMITS = {
+    'api.pro.coinbase.com': (10, 10),
+    'api.coingecko.com': (0.5, 5),  # Free tier allows about 30 calls per minute
+    'min-api.cryptocompare.com': (20, 20),
+}
+
+# Any other host, such as a local replay_server.py, gets DEFAULT_RATE_LIMIT.
+# PREDICTORS_RATE_LIMIT="rate,burst" overrides it, e.g. to load-test a stub.
+def _parse_rate_limit(text):
+    values = [float(value) for value in text.split(',')]
+    return values[0], values[1] if len(values) > 1 else max(1.0, values[0])
+
+DEFAULT_RATE_LIMIT = _parse_rate_limit(os.environ.get('PREDICTORS_RATE_LIMIT', '5,5'))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 5
+BACKOFF_SECONDS = 0.5
+MAX_BACKOFF_SECONDS = 60
+POOL_SIZE = 16
+TIMEOUT = 30
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    # Take a token if one is available and return 0, else return the seconds
+    # until one will be
+    def take(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    # Block until a token is available, then take it
+    def acquire(self):
+        while True:
+            wait = self.take()
+            if wait == 0:
+                return
+            time.sleep(wait)
+
+_lock = threading.Lock()
+_sessions = {}
+_buckets = {}
+
+# requests is imported on first use so importing this module stays cheap
+def _session_for(host):
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    with _lock:
+        if host not in _sessions:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _sessions[host] = session
+            _buckets[host] = TokenBucket(*RATE_LIMITS.get(host, DEFAULT_RATE_LIMIT))
+        return _sessions[host], _buckets[host]
+
+def _retry_delay(response, attempt):
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), MAX_BACKOFF_SECONDS)
+        except ValueError:
+            pass
+    return min(BACKOFF_SECONDS * 2 ** attempt, MAX_BACKOFF_SECONDS)
+
+# GET through a pooled keep-alive session for the URL's host, waiting for the
+# host's rate limit and retrying throttled or failed requests with exponential
+# backoff. The final response is returned so callers can check status_code.
+def get(url, params=None, timeout=TIMEOUT):
+    import requests
+
+    session, bucket = _session_for(urlparse(url).netloc)
+
+    for attempt in range(MAX_RETRIES + 1):
+        bucket.acquire()
+        try:
+            response = session.get(url, params=params, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == MAX_RETRIES:
+                raise
+            time.sleep(_retry_delay(None, attempt))
+            continue
+
+        if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            return response
+        time.sleep(_retry_delay(response, attempt))
+
+# Base class of the errors get() raises, for except clauses; only evaluated
+# once an exception is being handled, when requests is already loaded
+def request_error():
+    import requests
+
+    return requests.RequestException
+
+class AsyncTokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    # Wait until a token is available, then take it. Waiters queue on the lock,
+    # so they are served in arrival order.
+    async def acquire(self):
+        async with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self.tokens = 1
+                self.updated = time.monotonic()
+            self.tokens -= 1
+
+class AsyncResponse:
+    def __init__(self, status_code, headers, text):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+# asyncio counterpart of get(): one aiohttp session for every host of a run,
+# the same per-host rate limits, and the same retry and backoff policy. Use as
+# "async with AsyncSession() as session: await session.get(url, params)".
+class AsyncSession:
+    def __init__(self, pool_size=100, timeout=TIMEOUT):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.session = None
+        self.buckets = {}
+
+    async def __aenter__(self):
+        import aiohttp
+
+        self._errors = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.pool_size),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+
+    def _bucket(self, host):
+        if host not in self.buckets:
+            self.buckets[host] = AsyncTokenBucket(*RATE_LIMITS.get(host, DEFAULT_RATE_LIMIT))
+        return self.buckets[host]
+
+    async def get(self, url, params=None):
+        bucket = self._bucket(urlparse(url).netloc)
+        params = {key: str(value) for key, value in (params or {}).items()}
+
+        for attempt in range(MAX_RETRIES + 1):
+            await bucket.acquire()
+            try:
+                async with self.session.get(url, params=params) as raw:
+                    response = AsyncResponse(raw.status, raw.headers, await raw.text())
+            except self._errors:
+                if attempt == MAX_RETRIES:
+                    raise
+                await asyncio.sleep(_retry_delay(None, attempt))
+                continue
+
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                return response
+            await asyncio.sleep(_retry_delay(response, attempt))
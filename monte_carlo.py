@@ -1,23 +1,188 @@
+import argparse
+from datetime import datetime, timezone
 import numpy as np
-import matplotlib.pyplot as plt
-
-# Parameters
-initial_investment = 10000
-margin_rate = 0.07
-historical_returns = np.random.normal(0.095, 0.15, 10000)  # mean return, std deviation, number of simulations
-
-# Simulate returns
-portfolio_returns = []
-for r in historical_returns:
-    net_return = r - margin_rate
-    portfolio_value = initial_investment * (1 + net_return)
-    portfolio_returns.append(portfolio_value)
-
-# Plot results
-plt.hist(portfolio_returns, bins=50, alpha=0.75, color='blue')
-plt.title('Simulated Portfolio Values')
-plt.xlabel('Portfolio Value')
-plt.ylabel('Frequency')
-plt.axvline(x=initial_investment, color='r', linestyle='--', label='Initial Investment')
-plt.legend()
-plt.show()
+from simulation_results import histogram, run_metadata, write_results
+
+DEFAULT_CHUNK_SIZE = 1_000_000  # Path-periods generated at a time
+QUANTILES = [1, 5, 25, 50, 75, 95, 99]
+RUIN_LOSSES = [0.5, 0.9, 1.0]  # Report the chance of losing at least these shares of the equity
+
+# Financing rate of every path for one period: fixed, or mean-reverting
+# (Vasicek) around the starting rate when rate_volatility > 0, floored at zero
+def _next_rates(rates, rng, base_rate, rate_volatility, rate_reversion, dt):
+    if rate_volatility == 0:
+        return rates
+    shocks = rng.standard_normal(len(rates))
+    rates = rates + rate_reversion * (base_rate - rates) * dt + rate_volatility * np.sqrt(dt) * shocks
+    return np.maximum(rates, 0)
+
+# Simulate one block of paths through every period. Returns are drawn for the
+# whole (paths, periods) block up front; the periods are then stepped in
+# order because margin calls depend on the path so far, with every step a
+# handful of array operations over all paths.
+def _simulate_block(num_paths, rng, params):
+    periods, dt = params['periods'], params['dt']
+    returns = params['drift'] * dt + params['volatility'] * np.sqrt(dt) * rng.standard_normal((num_paths, periods))
+    np.maximum(returns, -1, out=returns)  # A position cannot lose more than its value
+
+    equity0, leverage = params['initial_equity'], params['leverage']
+    position = np.full(num_paths, equity0 * leverage, dtype=np.float64)
+    debt = np.full(num_paths, equity0 * (leverage - 1), dtype=np.float64)
+    rates = np.full(num_paths, params['financing_rate'], dtype=np.float64)
+    open_ = np.ones(num_paths, dtype=bool)
+    called = np.zeros(num_paths, dtype=bool)
+
+    for t in range(periods):
+        rates = _next_rates(rates, rng, params['financing_rate'], params['rate_volatility'], params['rate_reversion'], dt)
+        position *= 1 + returns[:, t]
+        debt = np.where(open_, debt * (1 + rates * dt), debt)
+        equity = position - debt
+        with np.errstate(invalid='ignore', divide='ignore'):
+            margin = np.where(position > 0, equity / position, -np.inf)
+
+        # Liquidation: the position is sold and whatever equity is left (which
+        # can be negative after a gap down) is held as cash from then on
+        liquidate = open_ & (margin < params['liquidation_margin'])
+        debt = np.where(liquidate, -equity, debt)
+        position = np.where(liquidate, 0, position)
+        open_ &= ~liquidate
+
+        # Margin call: sell enough to pay down debt back to the initial margin
+        call = open_ & (margin < params['maintenance_margin'])
+        target = np.where(call, equity * leverage, position)
+        debt = debt - (position - target)
+        position = target
+        called |= call
+
+    return position - debt, called, ~open_
+
+# Multi-period leveraged portfolio with margin calls and liquidation,
+# simulated in chunks of about chunk_size path-periods so memory stays flat.
+# Drift, volatility and the financing rate are annual; dt is the period length
+# in years. Returns the terminal equity of every path and how many paths had a
+# margin call or were liquidated.
+def simulate_margin(initial_equity, leverage, drift, volatility, periods, num_paths, dt=1.0,
+                    financing_rate=0.07, rate_volatility=0.0, rate_reversion=0.0,
+                    maintenance_margin=0.25, liquidation_margin=0.15,
+                    chunk_size=DEFAULT_CHUNK_SIZE, seed=None):
+    if leverage < 1:
+        raise ValueError("Leverage must be at least 1.")
+    if liquidation_margin > maintenance_margin:
+        raise ValueError("The liquidation margin must not exceed the maintenance margin.")
+    # A margin call deleverages back to the initial margin of 1 / leverage, which
+    # has to clear the maintenance margin or every call leaves the position as is
+    if 1 / leverage <= maintenance_margin:
+        raise ValueError(f"Leverage {leverage:g} gives an initial margin of {1 / leverage:.2%}, "
+                         f"which must be above the maintenance margin of {maintenance_margin:.2%}.")
+
+    params = {
+        'initial_equity': initial_equity,
+        'leverage': leverage,
+        'drift': drift,
+        'volatility': volatility,
+        'periods': periods,
+        'dt': dt,
+        'financing_rate': financing_rate,
+        'rate_volatility': rate_volatility,
+        'rate_reversion': rate_reversion,
+        'maintenance_margin': maintenance_margin,
+        'liquidation_margin': liquidation_margin,
+    }
+
+    paths_per_chunk = max(1, chunk_size // periods)
+    sizes = [min(paths_per_chunk, num_paths - start) for start in range(0, num_paths, paths_per_chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    terminal = np.empty(num_paths)
+    margin_calls = liquidations = 0
+    start = 0
+    for size, child in zip(sizes, seeds):
+        equity, called, liquidated = _simulate_block(size, np.random.default_rng(child), params)
+        terminal[start:start + size] = equity
+        margin_calls += int(called.sum())
+        liquidations += int(liquidated.sum())
+        start += size
+
+    return terminal, margin_calls, liquidations
+
+# Distribution statistics and ruin probabilities of simulate_margin's output
+def summarize(terminal, margin_calls, liquidations, initial_equity):
+    num_paths = len(terminal)
+    summary = {
+        'paths': num_paths,
+        'mean': float(terminal.mean()),
+        'std': float(terminal.std()),
+        'quantiles': dict(zip(QUANTILES, np.percentile(terminal, QUANTILES).tolist())),
+        'prob_loss': float((terminal < initial_equity).mean()),
+        'prob_margin_call': margin_calls / num_paths,
+        'prob_liquidation': liquidations / num_paths,
+        'prob_ruin': {loss: float((terminal <= initial_equity * (1 - loss)).mean()) for loss in RUIN_LOSSES},
+    }
+    return summary
+
+# matplotlib is only imported when a plot is actually shown
+def plot_results(terminal, initial_equity):
+    import matplotlib.pyplot as plt
+
+    # Plot results
+    plt.hist(terminal, bins=50, alpha=0.75, color='blue')
+    plt.title('Simulated Portfolio Values')
+    plt.xlabel('Portfolio Value')
+    plt.ylabel('Frequency')
+    plt.axvline(x=initial_equity, color='r', linestyle='--', label='Initial Investment')
+    plt.legend()
+    plt.show()
+
+def main():
+    parser = argparse.ArgumentParser(description='Monte Carlo simulation of a leveraged portfolio with margin calls.')
+    parser.add_argument('--initial_investment', type=float, default=10000, help='Starting equity in USD (default: 10000)')
+    parser.add_argument('--leverage', type=float, default=2.0, help='Position size as a multiple of equity (default: 2)')
+    parser.add_argument('--drift', type=float, default=0.095, help='Annual mean return (default: 0.095)')
+    parser.add_argument('--volatility', type=float, default=0.15, help='Annual return standard deviation (default: 0.15)')
+    parser.add_argument('--margin_rate', type=float, default=0.07, help='Annual financing rate on borrowed money (default: 0.07)')
+    parser.add_argument('--rate_volatility', type=float, default=0.0, help='Annual volatility of the financing rate (default: 0, fixed rate)')
+    parser.add_argument('--rate_reversion', type=float, default=0.5, help='Speed the financing rate reverts to --margin_rate (default: 0.5)')
+    parser.add_argument('--years', type=float, default=1.0, help='Years to simulate (default: 1)')
+    parser.add_argument('--periods_per_year', type=int, default=12, help='Margin checks per year (default: 12)')
+    parser.add_argument('--maintenance_margin', type=float, default=0.25, help='Equity share of the position that triggers a margin call (default: 0.25)')
+    parser.add_argument('--liquidation_margin', type=float, default=0.15, help='Equity share of the position that triggers liquidation (default: 0.15)')
+    parser.add_argument('--num_simulations', type=int, default=10000, help='Number of paths (default: 10000)')
+    parser.add_argument('--chunk_size', type=int, default=DEFAULT_CHUNK_SIZE, help='Path-periods simulated at a time (default: 1000000)')
+    parser.add_argument('--seed', type=int, help='Random seed for reproducible runs')
+    parser.add_argument('--no_plot', action='store_true', help='Only print the statistics')
+    parser.add_argument('--output', type=str, help='Write statistics, a binned histogram and run metadata to this JSON file instead of plotting')
+    parser.add_argument('--bins', type=int, default=100, help='Histogram bins for --output (default: 100)')
+
+    args = parser.parse_args()
+    started = datetime.now(timezone.utc)
+
+    periods = max(1, int(round(args.years * args.periods_per_year)))
+    try:
+        terminal, margin_calls, liquidations = simulate_margin(
+            args.initial_investment, args.leverage, args.drift, args.volatility, periods, args.num_simulations,
+            dt=1 / args.periods_per_year, financing_rate=args.margin_rate, rate_volatility=args.rate_volatility,
+            rate_reversion=args.rate_reversion, maintenance_margin=args.maintenance_margin,
+            liquidation_margin=args.liquidation_margin, chunk_size=args.chunk_size, seed=args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+    summary = summarize(terminal, margin_calls, liquidations, args.initial_investment)
+
+    print(f"Simulated {summary['paths']} paths over {periods} periods at {args.leverage:g}x leverage")
+    print(f"Mean Portfolio Value: {summary['mean']:,.2f} USD (std {summary['std']:,.2f})")
+    for q, value in summary['quantiles'].items():
+        print(f"{q}% Percentile: {value:,.2f} USD")
+    print(f"Probability of a Loss: {summary['prob_loss']:.2%}")
+    print(f"Probability of a Margin Call: {summary['prob_margin_call']:.2%}")
+    print(f"Probability of Liquidation: {summary['prob_liquidation']:.2%}")
+    for loss, prob in summary['prob_ruin'].items():
+        print(f"Probability of Losing {loss:.0%} or More: {prob:.2%}")
+
+    if args.output:
+        summary['histogram'] = histogram(terminal, args.bins)
+        write_results(args.output, summary, run_metadata(vars(args), started))
+        print(f"Results saved to {args.output}")
+    elif not args.no_plot:
+        plot_results(terminal, args.initial_investment)
+
+if __name__ == '__main__':
+    main()
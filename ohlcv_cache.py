@@ -0,0 +1,244 @@
+import asyncio
+import os
+import re
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+import pandas as pd
+
+# Root of the on-disk candle store, laid out as
+# <CACHE_DIR>/<source>/<ticker>/<interval>/<YYYY-MM-DD>.parquet
+CACHE_DIR = os.environ.get(
+    'PREDICTORS_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'predictors', 'ohlcv')
+)
+
+# Convert a period string (e.g. 5d, 1mo, 2y, ytd, max) to a start datetime
+def period_to_start(period, end_time):
+    if period == 'max':
+        return None
+    if period == 'ytd':
+        return datetime(end_time.year, 1, 1)
+
+    match = re.fullmatch(r'(\d+)(d|wk|mo|y)', period)
+    if not match:
+        raise ValueError(f"Invalid period: {period}")
+
+    count, unit = int(match.group(1)), match.group(2)
+    days_per_unit = {'d': 1, 'wk': 7, 'mo': 30, 'y': 365}
+    return end_time - timedelta(days=count * days_per_unit[unit])
+
+# Length of one bar of an intraday or daily interval such as 5m, 1h or 1d
+def interval_length(interval):
+    if interval.endswith('m'):
+        return pd.Timedelta(minutes=int(interval[:-1]))
+    if interval.endswith('h'):
+        return pd.Timedelta(hours=int(interval[:-1]))
+    if interval.endswith('d'):
+        return pd.Timedelta(days=int(interval[:-1]))
+    raise ValueError(f"Unsupported interval: {interval}")
+
+def _partition_dir(source, ticker, interval):
+    return os.path.join(CACHE_DIR, source, ticker.replace('/', '_'), interval)
+
+def _partition_path(source, ticker, interval, day):
+    return os.path.join(_partition_dir(source, ticker, interval), f"{day:%Y-%m-%d}.parquet")
+
+# Candles are partitioned and filtered in naive UTC, but each partition is
+# written in the timezone the provider returned (parquet keeps it with the
+# index) and results are converted back to it, so callers see the same
+# exchange-local timestamps as from an uncached download.
+def _to_naive_utc(df):
+    if isinstance(df.index, pd.DatetimeIndex) and df.index.tz is not None:
+        df = df.copy()
+        df.index = df.index.tz_convert('UTC').tz_localize(None)
+    return df
+
+def _source_tz(frames):
+    for frame in frames:
+        if isinstance(frame.index, pd.DatetimeIndex) and frame.index.tz is not None:
+            return frame.index.tz
+    return None
+
+def _from_naive_utc(df, tz):
+    if tz is None or not isinstance(df.index, pd.DatetimeIndex) or df.index.tz is not None:
+        return df
+    df = df.copy()
+    df.index = df.index.tz_localize('UTC').tz_convert(tz)
+    return df
+
+def _days(start, end):
+    day = pd.Timestamp(start).normalize()
+    while day < end:
+        yield day
+        day += pd.Timedelta(days=1)
+
+# Day-aligned (start, end) ranges that are not in the store yet. Only days that
+# have fully elapsed are ever stored, so the current day is always reported missing.
+def missing_ranges(source, ticker, interval, start, end, now=None):
+    now = pd.Timestamp(now or datetime.utcnow())
+    ranges = []
+    for day in _days(start, end):
+        day_end = day + pd.Timedelta(days=1)
+        if day_end <= now and os.path.exists(_partition_path(source, ticker, interval, day)):
+            continue
+        range_end = min(day_end, now)
+        if ranges and ranges[-1][1] == day:
+            ranges[-1] = (ranges[-1][0], range_end)
+        else:
+            ranges.append((day, range_end))
+    return ranges
+
+def load_cached(source, ticker, interval, start, end):
+    frames = []
+    for day in _days(start, end):
+        path = _partition_path(source, ticker, interval, day)
+        if os.path.exists(path):
+            frames.append(pd.read_parquet(path))
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames)
+
+# Write every fully elapsed day in [start, end) to its own partition. Days the
+# provider returned nothing for are written empty so they are not refetched,
+# but only when it returned rows somewhere in the range: an empty answer for
+# the whole range may be a failed download (yfinance returns an empty frame
+# instead of raising), and storing it would hide those days for good.
+def store_candles(source, ticker, interval, df, start, end, now=None):
+    now = pd.Timestamp(now or datetime.utcnow())
+    tz = _source_tz([df])
+    df = _to_naive_utc(df)
+    if df.empty or not ((df.index >= pd.Timestamp(start)) & (df.index < pd.Timestamp(end))).any():
+        return
+    os.makedirs(_partition_dir(source, ticker, interval), exist_ok=True)
+    for day in _days(start, end):
+        day_end = day + pd.Timedelta(days=1)
+        if day_end > now or day_end > end:
+            break
+        day_df = _from_naive_utc(df[(df.index >= day) & (df.index < day_end)], tz)
+        path = _partition_path(source, ticker, interval, day)
+        tmp_path = path + '.tmp'
+        day_df.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+
+# Return candles for [start, end), reading complete days from the store and
+# calling fetch_range(range_start, range_end) only for the gaps.
+def cached_fetch(source, ticker, interval, start, end, fetch_range):
+    if start is None:
+        return _combine([fetch_range(None, end)], None, end)
+
+    now = datetime.utcnow()
+    frames = [load_cached(source, ticker, interval, start, end)]
+    for range_start, range_end in missing_ranges(source, ticker, interval, start, end, now):
+        fetched = fetch_range(range_start.to_pydatetime(), range_end.to_pydatetime())
+        store_candles(source, ticker, interval, fetched, range_start, range_end, now)
+        frames.append(fetched)
+
+    return _combine(frames, start, end)
+
+# cached_fetch for a coroutine fetch_range: the missing ranges are fetched
+# concurrently, while the small local cache files are read and written inline
+async def cached_fetch_async(source, ticker, interval, start, end, fetch_range):
+    if start is None:
+        return _combine([await fetch_range(None, end)], None, end)
+
+    now = datetime.utcnow()
+    frames = [load_cached(source, ticker, interval, start, end)]
+    missing = missing_ranges(source, ticker, interval, start, end, now)
+    fetched = await asyncio.gather(*(fetch_range(range_start.to_pydatetime(), range_end.to_pydatetime())
+                                     for range_start, range_end in missing))
+    for (range_start, range_end), df in zip(missing, fetched):
+        store_candles(source, ticker, interval, df, range_start, range_end, now)
+        frames.append(df)
+
+    return _combine(frames, start, end)
+
+# Merge cached and fetched frames in naive UTC, keep [start, end) and convert
+# the result back to the source timezone
+def _combine(frames, start, end):
+    tz = _source_tz(frames)
+    frames = [_to_naive_utc(frame) for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+
+    df = pd.concat(frames).sort_index()
+    df = df[~df.index.duplicated(keep='last')]
+    if start is None:
+        df = df[df.index < pd.Timestamp(end)]
+    else:
+        df = df[(df.index >= pd.Timestamp(start)) & (df.index < pd.Timestamp(end))]
+    return _from_naive_utc(df, tz)
+
+def _resolve_range(period, start, end):
+    end = pd.Timestamp(end).to_pydatetime() if end is not None else datetime.utcnow()
+    if start is not None:
+        start = pd.Timestamp(start).to_pydatetime()
+    elif period is not None:
+        start = period_to_start(period, end)
+    return start, end
+
+_yfinance_lock = threading.Lock()
+
+# yf.download keeps its results in module globals (yfinance.shared) that every
+# call resets, so two calls running at once can lose or swap tickers' frames.
+# Downloads therefore run one at a time; yfinance's own threads parallelize
+# the tickers within a call, and the cache writes happen outside the lock.
+def _yf_download(tickers, **kwargs):
+    import yfinance as yf
+
+    with _yfinance_lock:
+        return yf.download(tickers, **kwargs)
+
+# Select one ticker's columns from a (possibly multi-ticker) yfinance frame
+def _ticker_columns(df, ticker):
+    if not isinstance(df.columns, pd.MultiIndex):
+        return df
+    if ticker in df.columns.get_level_values(0):
+        df = df[ticker]
+    elif ticker in df.columns.get_level_values(-1):
+        df = df.xs(ticker, axis=1, level=-1)
+    else:
+        return pd.DataFrame()
+    return df.dropna(how='all')
+
+# Download a single ticker from Yahoo Finance, going through the candle store
+def cached_yfinance_download(ticker, interval='1d', period=None, start=None, end=None):
+    start, end = _resolve_range(period, start, end)
+
+    def fetch_range(range_start, range_end):
+        if range_start is None:
+            df = _yf_download(ticker, period='max', interval=interval, progress=False)
+        else:
+            df = _yf_download(ticker, start=range_start, end=range_end, interval=interval, progress=False)
+        if isinstance(df.columns, pd.MultiIndex):
+            df.columns = df.columns.get_level_values(0)
+        return df
+
+    return cached_fetch('yfinance', ticker, interval, start, end, fetch_range)
+
+# Download many tickers from Yahoo Finance with one multi-ticker request per
+# missing range, returning a dict of ticker -> frame
+def cached_yfinance_download_many(tickers, interval='1d', period=None, start=None, end=None):
+    start, end = _resolve_range(period, start, end)
+    if start is None:
+        df = _yf_download(list(tickers), period='max', interval=interval, group_by='ticker', progress=False)
+        return {ticker: _combine([_ticker_columns(df, ticker)], None, end) for ticker in tickers}
+
+    now = datetime.utcnow()
+    frames = {ticker: [load_cached('yfinance', ticker, interval, start, end)] for ticker in tickers}
+
+    # Tickers cached up to the same point share their missing ranges
+    tickers_by_range = defaultdict(list)
+    for ticker in tickers:
+        for missing in missing_ranges('yfinance', ticker, interval, start, end, now):
+            tickers_by_range[missing].append(ticker)
+
+    for (range_start, range_end), group in tickers_by_range.items():
+        df = _yf_download(group, start=range_start.to_pydatetime(), end=range_end.to_pydatetime(),
+                         interval=interval, group_by='ticker', progress=False)
+        for ticker in group:
+            ticker_df = _ticker_columns(df, ticker)
+            store_candles('yfinance', ticker, interval, ticker_df, range_start, range_end, now)
+            frames[ticker].append(ticker_df)
+
+    return {ticker: _combine(frames[ticker], start, end) for ticker in tickers}
@@ -0,0 +1,42 @@
+import argparse
+import pandas as pd
+from seasonality import bucket_time, time_of_day_profile
+from ohlcv_cache import cached_yfinance_download
+
+# Define a function to fetch historical intraday data
+def fetch_intraday_data(ticker, interval='5m', period='7d'):
+    data = cached_yfinance_download(ticker, interval=interval, period=period)
+    return data
+
+# Define a function to determine the best time of day to buy
+def best_time_to_buy(data):
+    # Convert index to datetime
+    data.index = pd.to_datetime(data.index)
+
+    # Average the close price by minute of the day
+    avg_price_by_time = time_of_day_profile(data.index, data['Close'], bucket_minutes=1)['mean']
+
+    # Find the time of day with the lowest average close price
+    best_time = bucket_time(avg_price_by_time.idxmin())
+    lowest_avg_price = avg_price_by_time.min()
+
+    return best_time, lowest_avg_price
+
+def main():
+    parser = argparse.ArgumentParser(description='Find the time of day with the lowest average close price.')
+    parser.add_argument('--ticker', type=str, default='BTC-USD', help='Ticker symbol (default: BTC-USD)')
+    parser.add_argument('--interval', type=str, default='1d', help='Data interval (default: 1d)')
+    parser.add_argument('--period', type=str, default='1y', help='Data period (default: 1y)')
+
+    args = parser.parse_args()
+
+    # Fetch intraday data
+    data = fetch_intraday_data(args.ticker, interval=args.interval, period=args.period)
+
+    # Determine the best time of day to buy
+    best_time, lowest_avg_price = best_time_to_buy(data)
+
+    print(f"The best time of day to buy {args.ticker} is at {best_time} with an average close price of ${lowest_avg_price:.2f}")
+
+if __name__ == '__main__':
+    main()
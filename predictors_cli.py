@@ -0,0 +1,49 @@
+import argparse
+import importlib
+import sys
+
+# Subcommand -> (module whose main() runs it, one-line description). Modules
+# are only imported once their subcommand is chosen, so `predictors --help`
+# and every subcommand only pay for the imports they use.
+COMMANDS = {
+    'best-time': ('best_time_to_buy', 'Best time of day to buy across data sources and tickers'),
+    'best-time-coinbase': ('best_time_to_buy_coinbase', 'Best time of day to buy from Coinbase candles'),
+    'best-time-coingecko': ('best_time_to_buy_coingecko', 'Best time of day to buy from CoinGecko prices'),
+    'optimal-time': ('optimal_time_to_buy', 'Time of day with the lowest average yfinance close'),
+    'compare-buying': ('compare_buying_strategies', 'Compare optimal-time, multiple-purchase and DCA buying'),
+    'compare-purchase': ('compare_purchase_strategies', 'Optimal hour vs. every 4 hours, in-sample or walk-forward'),
+    'compare-schedules': ('compare_daily_bimonthly', 'Compare periodic purchase schedules over a price history'),
+    'dca': ('dca_strategies', 'Aggressive DCA levels from historical dips, with an optional ladder backtest'),
+    'dca-orders': ('dca_strategy', 'Distribute limit orders below the market price'),
+    'sweep-ladders': ('sweep_dca_ladders', 'Grid-search daily limit-order DCA ladders'),
+    'simulate': ('price_simulator', 'Simulate BTC and BCH prices and report confidence intervals'),
+    'simulate-joint': ('price_simulator2', 'Jointly simulate correlated assets and a portfolio'),
+    'margin': ('monte_carlo', 'Monte Carlo of a leveraged portfolio with margin calls'),
+    'extract': ('yfinance_extractor', 'Download and incrementally update price history files'),
+    'coins': ('coingecko_coins', 'Search the cached CoinGecko coin list'),
+    'fetch': ('providers', 'Fetch normalized candles for many tickers concurrently'),
+    'replay': ('replay_server', 'Record provider API responses and serve them back locally'),
+    'bench': ('benchmarks', 'Time the analyses on synthetic data and compare with earlier runs'),
+}
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(
+        prog='predictors',
+        description='Crypto price analysis and simulation tools.',
+        epilog='Commands:\n' + '\n'.join(f"  {name:<20} {description}" for name, (_, description) in COMMANDS.items())
+               + "\n\nRun 'predictors COMMAND --help' for a command's options.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('command', choices=list(COMMANDS), metavar='COMMAND', help='Command to run')
+    parser.add_argument('args', nargs=argparse.REMAINDER, help='Options for the command')
+
+    args = parser.parse_args(argv)
+
+    # Each command parses its own options from sys.argv
+    module_name, _ = COMMANDS[args.command]
+    sys.argv = [f"predictors {args.command}", *args.args]
+    importlib.import_module(module_name).main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from seasonality import MINUTES_PER_DAY, NANOS_PER_MINUTE
+
+NANOS_PER_DAY = MINUTES_PER_DAY * NANOS_PER_MINUTE
+
+# Price history held as one contiguous int64 array of UTC epoch nanoseconds
+# plus one contiguous array per column. Slicing by time range or time of day
+# returns views of the same arrays, and nothing here writes to them, so one
+# loaded series can be shared by every analysis without copies.
+class PriceSeries:
+    def __init__(self, times, columns, tz=None):
+        self.times = np.asarray(times, dtype=np.int64)
+        self.columns = {name: np.asarray(values) for name, values in columns.items()}
+        self.tz = tz
+        for name, values in self.columns.items():
+            if len(values) != len(self.times):
+                raise ValueError(f"Column {name} has {len(values)} values for {len(self.times)} timestamps.")
+
+    # Build from a DataFrame indexed by time. The frame itself is left as is.
+    @classmethod
+    def from_frame(cls, df, dtype=np.float64, columns=None):
+        index = pd.DatetimeIndex(df.index)
+        tz = str(index.tz) if index.tz is not None else None
+        if tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+        times = index.as_unit('ns').asi8
+        order = None if index.is_monotonic_increasing else np.argsort(times, kind='stable')
+        if order is not None:
+            times = times[order]
+
+        data = {}
+        for name in columns or df.columns:
+            values = df[name].to_numpy(dtype=dtype)
+            data[name] = np.ascontiguousarray(values if order is None else values[order])
+        return cls(np.ascontiguousarray(times), data, tz)
+
+    def __len__(self):
+        return len(self.times)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    @property
+    def empty(self):
+        return len(self.times) == 0
+
+    # DatetimeIndex over the timestamp array (wall time in the original zone)
+    @property
+    def index(self):
+        index = pd.DatetimeIndex(self.times.view('datetime64[ns]'))
+        return index.tz_localize('UTC').tz_convert(self.tz) if self.tz else index
+
+    def _view(self, selection):
+        return PriceSeries(self.times[selection], {name: values[selection] for name, values in self.columns.items()}, self.tz)
+
+    def _as_ns(self, value):
+        timestamp = pd.Timestamp(value)
+        if timestamp.tzinfo is None and self.tz:
+            timestamp = timestamp.tz_localize(self.tz)
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.tz_convert('UTC').tz_localize(None)
+        return timestamp.as_unit('ns').value
+
+    # Bars in [start, end); either bound may be None
+    def between(self, start=None, end=None):
+        first = 0 if start is None else np.searchsorted(self.times, self._as_ns(start), side='left')
+        last = len(self.times) if end is None else np.searchsorted(self.times, self._as_ns(end), side='left')
+        return self._view(slice(first, last))
+
+    # Minute of the day (in the series' own time zone) of every bar
+    def minute_of_day(self):
+        times = self.times
+        if self.tz:
+            times = self.index.tz_localize(None).as_unit('ns').asi8
+        return (times % NANOS_PER_DAY) // NANOS_PER_MINUTE
+
+    # Regular bar spacing in nanoseconds, or None for irregular series
+    def step(self):
+        if len(self.times) < 2:
+            return None
+        steps = np.diff(self.times)
+        return int(steps[0]) if (steps == steps[0]).all() else None
+
+    # Bars at one time of day. For regular series whose spacing divides a day
+    # (in UTC or naive time, so no DST shifts) this is a strided view; otherwise
+    # the matching bars are gathered into a new series.
+    def at_time(self, hour, minute=0):
+        target = hour * 60 + minute
+        step = self.step()
+        if step and NANOS_PER_DAY % step == 0 and self.tz in (None, 'UTC'):
+            minutes = self.minute_of_day()
+            hits = np.flatnonzero(minutes[:NANOS_PER_DAY // step] == target)
+            if len(hits) == 0:
+                return self._view(slice(0, 0))
+            return self._view(slice(hits[0], None, NANOS_PER_DAY // step))
+        return self._view(self.minute_of_day() == target)
+
+    def to_frame(self, index_name=None):
+        index = self.index.rename(index_name)
+        return pd.DataFrame(self.columns, index=index, copy=False)
+
+    # One .npy file per array so load() can memory-map each column
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'times.npy'), self.times)
+        for name, values in self.columns.items():
+            np.save(os.path.join(path, f"{name}.npy"), values)
+        tmp_path = os.path.join(path, 'meta.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'columns': list(self.columns), 'tz': self.tz}, f)
+        os.replace(tmp_path, os.path.join(path, 'meta.json'))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        mode = 'r' if mmap else None
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        times = np.load(os.path.join(path, 'times.npy'), mmap_mode=mode)
+        columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode) for name in meta['columns']}
+        return cls(times, columns, meta['tz'])
+
+# Directory a CSV export's binary copy is kept in, e.g. btc_prices.csv ->
+# btc_prices.series
+def series_path(csv_path):
+    return os.path.splitext(csv_path)[0] + '.series'
+
+# Memory-mapped series saved next to a CSV export, or None when it is missing
+# or older than the CSV (so a hand-edited CSV still wins)
+def load_series_for(csv_path):
+    path = series_path(csv_path)
+    meta = os.path.join(path, 'meta.json')
+    if not os.path.exists(meta):
+        return None
+    if os.path.exists(csv_path) and os.path.getmtime(csv_path) > os.path.getmtime(meta):
+        return None
+    return PriceSeries.load(path)
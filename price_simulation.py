@@ -0,0 +1,156 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNK_SIZE = 250_000
+HISTOGRAM_BINS = 1 << 16
+HISTOGRAM_SIGMAS = 12
+
+# Mean and standard deviation of the terminal log price of a GBM path that
+# starts at initial_price and takes num_days - 1 steps of length dt
+def _terminal_log_moments(initial_price, drift, volatility, num_days, dt):
+    num_steps = num_days - 1
+    mean = np.log(initial_price) + (drift - 0.5 * volatility**2) * dt * num_steps
+    std = volatility * np.sqrt(dt * num_steps)
+    return mean, std
+
+# Terminal log prices for successive chunks of paths. Only the sum of the daily
+# log-returns matters for the terminal price, and the sum of num_steps
+# independent N(0, 1) shocks is exactly sqrt(num_steps) * N(0, 1), so each path
+# needs one draw instead of one per day and no (paths, days) matrix is built.
+def _terminal_log_price_chunks(params, chunks):
+    initial_price, drift, volatility, num_days, dt = params
+    mean, std = _terminal_log_moments(initial_price, drift, volatility, num_days, dt)
+    for size, rng in chunks:
+        yield mean + std * rng.standard_normal(size)
+
+# Split num_paths into chunks, each with its own random stream. Without an rng the
+# streams come from SeedSequence(seed).spawn, so chunk i always draws the same
+# numbers no matter which worker runs it and results do not depend on workers.
+def _plan_chunks(num_paths, chunk_size, seed, rng):
+    sizes = [min(chunk_size, num_paths - start) for start in range(0, num_paths, chunk_size)]
+    if rng is not None:
+        return [(size, rng) for size in sizes]
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    seeds = root.spawn(len(sizes))
+    return list(zip(sizes, seeds))
+
+def _chunk_rngs(chunks):
+    return [(size, seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)) for size, seed in chunks]
+
+def _log_prices_task(chunks, params):
+    return np.concatenate(list(_terminal_log_price_chunks(params, _chunk_rngs(chunks))))
+
+def _histogram_task(chunks, params, edges):
+    counts = np.zeros(len(edges) - 1, dtype=np.int64)
+    for log_prices in _terminal_log_price_chunks(params, _chunk_rngs(chunks)):
+        counts += histogram_counts(log_prices, edges)
+    return counts
+
+# Run task over the chunks, sharding contiguous runs of chunks across a process
+# pool when workers > 1. Results come back in chunk order.
+def _map_chunks(task, chunks, workers, *args):
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(chunks) <= 1:
+        return [task(chunks, *args)]
+    if any(isinstance(seed, np.random.Generator) for _, seed in chunks):
+        raise ValueError("Pass seed instead of rng to run with more than one worker")
+
+    shards = np.array_split(np.arange(len(chunks)), min(workers, len(chunks)))
+    with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+        futures = [executor.submit(task, [chunks[i] for i in shard], *args) for shard in shards]
+        return [future.result() for future in futures]
+
+# Simulated terminal prices, generated chunk_size paths at a time
+def simulate_price(initial_price, drift, volatility, num_paths, num_days, dt=1.0, chunk_size=DEFAULT_CHUNK_SIZE, rng=None, seed=None, workers=1):
+    params = (initial_price, drift, volatility, num_days, dt)
+    chunks = _plan_chunks(num_paths, chunk_size, seed, rng)
+    return np.exp(np.concatenate(_map_chunks(_log_prices_task, chunks, workers, params)))
+
+# Histogram of terminal log prices over a fixed grid of +/-12 standard
+# deviations, accumulated chunk by chunk so memory stays constant in num_paths.
+# Histograms built on the same grid merge by adding their counts, which is how
+# the per-worker results are combined.
+def simulate_price_histogram(initial_price, drift, volatility, num_paths, num_days, dt=1.0, chunk_size=DEFAULT_CHUNK_SIZE, rng=None, bins=HISTOGRAM_BINS, seed=None, workers=1):
+    params = (initial_price, drift, volatility, num_days, dt)
+    edges = log_price_grid(initial_price, drift, volatility, num_days, dt, bins)
+    chunks = _plan_chunks(num_paths, chunk_size, seed, rng)
+    counts = np.sum(_map_chunks(_histogram_task, chunks, workers, params, edges), axis=0)
+    return edges, counts
+
+def log_price_grid(initial_price, drift, volatility, num_days, dt=1.0, bins=HISTOGRAM_BINS):
+    mean, std = _terminal_log_moments(initial_price, drift, volatility, num_days, dt)
+    std = max(std, 1e-12)
+    return np.linspace(mean - HISTOGRAM_SIGMAS * std, mean + HISTOGRAM_SIGMAS * std, bins + 1)
+
+# Bin log prices on a uniform grid; values beyond the grid land in the end bins
+def histogram_counts(log_prices, edges):
+    bins = len(edges) - 1
+    width = edges[1] - edges[0]
+    index = np.clip(((log_prices - edges[0]) / width).astype(np.int64), 0, bins - 1)
+    return np.bincount(index, minlength=bins)
+
+# Percentiles (0-100) of the prices summarized by a log-price histogram,
+# interpolating linearly inside the bin that holds each percentile
+def histogram_percentiles(edges, counts, percentiles):
+    cumulative = np.cumsum(counts)
+    targets = np.asarray(percentiles, dtype=np.float64) / 100 * cumulative[-1]
+    index = np.clip(np.searchsorted(cumulative, targets), 0, len(counts) - 1)
+    below = np.where(index > 0, cumulative[index - 1], 0)
+    fraction = np.divide(targets - below, counts[index], out=np.zeros_like(targets), where=counts[index] > 0)
+    log_prices = edges[index] + fraction * (edges[index + 1] - edges[index])
+    return np.exp(log_prices)
+
+# Percentiles of the simulated terminal price without keeping the paths
+def simulate_price_percentiles(initial_price, drift, volatility, num_paths, num_days, percentiles, dt=1.0, chunk_size=DEFAULT_CHUNK_SIZE, rng=None, seed=None, workers=1):
+    edges, counts = simulate_price_histogram(initial_price, drift, volatility, num_paths, num_days, dt, chunk_size, rng, seed=seed, workers=workers)
+    return histogram_percentiles(edges, counts, percentiles)
+
+# Annualized drift vector and covariance matrix of several assets from their
+# periodic returns (e.g. a dict of ticker -> calculate_returns output), using
+# only the dates every asset has a return for
+def estimate_drift_and_covariance(returns, periods_per_year=365):
+    if isinstance(returns, dict):
+        returns = pd.concat(returns, axis=1)
+    returns = returns.dropna()
+    drift = returns.mean().to_numpy() * periods_per_year
+    covariance = returns.cov().to_numpy() * periods_per_year
+    return list(returns.columns), drift, covariance
+
+# Matrix L with L @ L.T == covariance; falls back to an eigendecomposition when
+# the matrix is only positive semi-definite (e.g. perfectly correlated assets)
+def _covariance_factor(covariance):
+    try:
+        return np.linalg.cholesky(covariance)
+    except np.linalg.LinAlgError:
+        values, vectors = np.linalg.eigh(covariance)
+        return vectors * np.sqrt(np.clip(values, 0, None))
+
+def _joint_log_prices_task(chunks, mean, factor):
+    return np.concatenate([mean + rng.standard_normal((size, len(mean))) @ factor.T for size, rng in _chunk_rngs(chunks)])
+
+# Correlated terminal prices of several assets as a (num_paths, num_assets)
+# array. As in the single-asset case the daily shocks are summed analytically:
+# the terminal log prices are jointly normal with covariance covariance * dt *
+# num_steps, drawn in one batched product with its Cholesky factor per chunk.
+def simulate_joint_prices(initial_prices, drifts, covariance, num_paths, num_days, dt=1.0, chunk_size=DEFAULT_CHUNK_SIZE, seed=None, workers=1):
+    initial_prices = np.asarray(initial_prices, dtype=np.float64)
+    drifts = np.asarray(drifts, dtype=np.float64)
+    covariance = np.asarray(covariance, dtype=np.float64)
+    horizon = dt * (num_days - 1)
+
+    mean = np.log(initial_prices) + (drifts - 0.5 * np.diag(covariance)) * horizon
+    factor = _covariance_factor(covariance * horizon)
+
+    chunks = _plan_chunks(num_paths, chunk_size, seed, None)
+    return np.exp(np.concatenate(_map_chunks(_joint_log_prices_task, chunks, workers, mean, factor)))
+
+# Value of a portfolio holding the given number of units of each asset, per path
+def portfolio_values(prices, holdings):
+    return prices @ np.asarray(holdings, dtype=np.float64)
+
+# Fraction of paths on which every asset ends inside its own [lower, upper] band
+def joint_coverage(prices, lower, upper):
+    return np.mean(np.all((prices >= lower) & (prices <= upper), axis=1))
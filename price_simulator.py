@@ -0,0 +1,69 @@
+import argparse
+from datetime import datetime, timezone
+import numpy as np
+from price_simulation import histogram_percentiles, simulate_price_histogram
+from simulation_results import coarsen_histogram, run_metadata, write_results
+
+# Parameters
+initial_price_btc = 67000  # Example initial price
+initial_price_bch = 390    # Example initial price
+drift_btc = 0.01  # Example drift (historical average return)
+volatility_btc = 0.02  # Example volatility (historical standard deviation)
+drift_bch = 0.02  # Example drift (historical average return)
+volatility_bch = 0.03  # Example volatility (historical standard deviation)
+num_paths = 2000
+chunk_size = 250_000  # Paths generated at a time; bounds memory for large num_paths
+workers = 1  # Processes to shard paths across; results do not depend on this
+num_days = 200  # Approximate number of days to December 2024
+seed = 42  # For reproducibility
+
+percentiles = [2.5, 97.5, 0.5, 99.5]
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate BTC and BCH prices and report confidence intervals.')
+    parser.add_argument('--num_paths', type=int, default=num_paths, help=f'Simulated paths per asset (default: {num_paths})')
+    parser.add_argument('--num_days', type=int, default=num_days, help=f'Days to simulate (default: {num_days})')
+    parser.add_argument('--workers', type=int, default=workers, help=f'Processes to shard paths across (default: {workers})')
+    parser.add_argument('--seed', type=int, default=seed, help=f'Random seed (default: {seed})')
+    parser.add_argument('--output', type=str, help='Also write percentiles, binned histograms and run metadata to this JSON file')
+    parser.add_argument('--bins', type=int, default=100, help='Histogram bins for --output (default: 100)')
+
+    args = parser.parse_args()
+    started = datetime.now(timezone.utc)
+
+    btc_seed, bch_seed = np.random.SeedSequence(args.seed).spawn(2)
+
+    # Simulate BTC and BCH prices, keeping only a histogram of the final log price
+    assets = {
+        'BTC': (initial_price_btc, drift_btc, volatility_btc, btc_seed),
+        'BCH': (initial_price_bch, drift_bch, volatility_bch, bch_seed),
+    }
+    results = {}
+    for symbol, (initial_price, drift, volatility, asset_seed) in assets.items():
+        edges, counts = simulate_price_histogram(initial_price, drift, volatility, args.num_paths, args.num_days,
+                                                 chunk_size=chunk_size, seed=asset_seed, workers=args.workers)
+        values = histogram_percentiles(edges, counts, percentiles)
+
+        # Calculate confidence intervals
+        ci_95, ci_99 = values[:2], values[2:]
+        print(f"{symbol} 95%: {ci_95}")
+        print(f"{symbol} 99%: {ci_99}")
+
+        results[symbol] = {
+            'initial_price': initial_price,
+            'percentiles': dict(zip(percentiles, values.tolist())),
+            'histogram': coarsen_histogram(edges, counts, args.bins, transform=np.exp),
+        }
+
+    if args.output:
+        params = {
+            'num_paths': args.num_paths,
+            'num_days': args.num_days,
+            'seed': args.seed,
+            'assets': {symbol: {'initial_price': p, 'drift': d, 'volatility': v} for symbol, (p, d, v, _) in assets.items()},
+        }
+        write_results(args.output, results, run_metadata(params, started))
+        print(f"Results saved to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+import argparse
+import numpy as np
+from datetime import datetime, timezone
+from ohlcv_cache import cached_yfinance_download
+from price_simulation import estimate_drift_and_covariance, joint_coverage, portfolio_values, simulate_joint_prices
+from simulation_results import histogram, run_metadata, write_results
+
+# Download historical data
+def get_data(ticker, start_date, end_date):
+    data = cached_yfinance_download(ticker, interval='1d', start=start_date, end=end_date)
+    return data['Close']
+
+# Calculate returns
+def calculate_returns(prices):
+    returns = prices.pct_change().dropna()
+    return returns
+
+# Calculate average return and standard deviation
+def calculate_metrics(returns):
+    average_return = returns.mean()
+    std_deviation = returns.std()
+    return average_return, std_deviation
+
+# Define parameters
+tickers = ['BTC-USD', 'BCH-USD']
+start_date = '2023-01-01'
+end_date = '2024-07-01'
+
+# Target date range of the simulation
+simulation_start = datetime(2024, 7, 20)
+simulation_end = datetime(2024, 12, 31)
+
+# Parameters for simulation
+portfolio_usd = {'BTC-USD': 5000, 'BCH-USD': 5000}  # USD held in each asset today
+num_paths = 50000
+chunk_size = 250_000  # Paths generated at a time; bounds memory for large num_paths
+dt = 1 / 365  # Using calendar days
+workers = 1  # Processes to shard paths across; results do not depend on this
+seed = None
+
+# Format results for better readability
+def format_number(num):
+    return "{:,.2f}".format(num)
+
+def main():
+    parser = argparse.ArgumentParser(description='Jointly simulate correlated asset prices and a portfolio of them.')
+    parser.add_argument('--num_paths', type=int, default=num_paths, help=f'Simulated paths (default: {num_paths})')
+    parser.add_argument('--workers', type=int, default=workers, help=f'Processes to shard paths across (default: {workers})')
+    parser.add_argument('--seed', type=int, default=seed, help='Random seed for reproducible runs')
+    parser.add_argument('--output', type=str, help='Also write intervals, binned histograms and run metadata to this JSON file')
+    parser.add_argument('--bins', type=int, default=100, help='Histogram bins for --output (default: 100)')
+
+    args = parser.parse_args()
+    started = datetime.now(timezone.utc)
+
+    # Get data and calculate returns for every ticker
+    prices = {ticker: get_data(ticker, start_date, end_date) for ticker in tickers}
+    returns = {ticker: calculate_returns(prices[ticker]) for ticker in tickers}
+
+    # Annualized drift and covariance based on 365 days, estimated jointly so the
+    # simulation keeps the correlation between the assets
+    days_per_year = 365
+    names, drifts, covariance = estimate_drift_and_covariance(returns, days_per_year)
+
+    # Calculate number of days to target date
+    num_days = (simulation_end - simulation_start).days
+
+    initial_prices = [prices[ticker].iloc[-1] for ticker in names]  # Using the most recent closing prices
+
+    # Simulate all assets together with correlated shocks
+    simulated = simulate_joint_prices(initial_prices, drifts, covariance, args.num_paths, num_days, dt=dt, chunk_size=chunk_size, seed=args.seed, workers=args.workers)
+    holdings = [portfolio_usd.get(ticker, 0) / price for ticker, price in zip(names, initial_prices)]
+    portfolio = portfolio_values(simulated, holdings)
+
+    # Calculate 95% and 99% confidence intervals
+    ci_95 = np.percentile(simulated, [2.5, 97.5], axis=0)
+    ci_99 = np.percentile(simulated, [0.5, 99.5], axis=0)
+    portfolio_ci_95 = np.percentile(portfolio, [2.5, 97.5])
+    portfolio_ci_99 = np.percentile(portfolio, [0.5, 99.5])
+    coverage = joint_coverage(simulated, ci_95[0], ci_95[1])
+
+    # Print results
+    for i, ticker in enumerate(names):
+        symbol = ticker.split('-')[0]
+        print(f"{symbol} 95% Confidence Interval: [{format_number(ci_95[0, i])}, {format_number(ci_95[1, i])}]")
+        print(f"{symbol} 99% Confidence Interval: [{format_number(ci_99[0, i])}, {format_number(ci_99[1, i])}]")
+
+    print(f"Probability all assets end inside their 95% intervals: {coverage:.2%}")
+    print(f"Portfolio 95% Confidence Interval: [{format_number(portfolio_ci_95[0])}, {format_number(portfolio_ci_95[1])}]")
+    print(f"Portfolio 99% Confidence Interval: [{format_number(portfolio_ci_99[0])}, {format_number(portfolio_ci_99[1])}]")
+
+    if args.output:
+        results = {
+            ticker: {
+                'initial_price': initial_prices[i],
+                'percentiles': {'0.5': ci_99[0, i], '2.5': ci_95[0, i], '97.5': ci_95[1, i], '99.5': ci_99[1, i]},
+                'histogram': histogram(simulated[:, i], args.bins),
+            }
+            for i, ticker in enumerate(names)
+        }
+        results['portfolio'] = {
+            'initial_value': sum(portfolio_usd.get(ticker, 0) for ticker in names),
+            'percentiles': {'0.5': portfolio_ci_99[0], '2.5': portfolio_ci_95[0], '97.5': portfolio_ci_95[1], '99.5': portfolio_ci_99[1]},
+            'histogram': histogram(portfolio, args.bins),
+        }
+        results['joint_coverage_95'] = coverage
+        params = {
+            'tickers': names,
+            'history': [start_date, end_date],
+            'num_days': num_days,
+            'num_paths': args.num_paths,
+            'seed': args.seed,
+            'drifts': drifts,
+            'covariance': covariance,
+            'portfolio_usd': portfolio_usd,
+        }
+        write_results(args.output, results, run_metadata(params, started))
+        print(f"Results saved to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+import argparse
+import asyncio
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import coinbase_candles
+import coingecko_coins
+import cryptocompare_candles
+from http_client import AsyncSession
+from ohlcv_cache import cached_fetch_async, cached_yfinance_download, cached_yfinance_download_many, period_to_start
+
+# Every adapter returns candles in this shape: a naive UTC DatetimeIndex named
+# 'time', sorted and unique, and float64 columns in this order
+CANDLE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+COINGECKO_URL = coingecko_coins.BASE_URL
+
+COINGECKO_RESAMPLE = {
+    '1m': '1min',
+    '5m': '5min',
+    '15m': '15min',
+    '30m': '30min',
+    '60m': '1h',
+    '1d': '1D',
+}
+
+def normalize_candles(df):
+    if df.empty:
+        return pd.DataFrame(columns=CANDLE_COLUMNS, index=pd.DatetimeIndex([], name='time'), dtype=np.float64)
+    df = df.rename(columns=str.lower)
+    df = df.reindex(columns=CANDLE_COLUMNS).astype(np.float64)
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    df.index = index.as_unit('ns').rename('time')
+    df = df.sort_index()
+    return df[~df.index.duplicated(keep='last')]
+
+# Parse a /market_chart/range response into mean prices per interval
+def coingecko_prices_frame(data, interval):
+    if 'prices' not in data:
+        raise ValueError("No price data returned from API.")
+    if interval not in COINGECKO_RESAMPLE:
+        raise ValueError(f"Unsupported interval: {interval}")
+
+    df = pd.DataFrame(data['prices'], columns=['time', 'price'])
+    df['time'] = pd.to_datetime(df['time'], unit='ms')
+    df.set_index('time', inplace=True)
+    return df.resample(COINGECKO_RESAMPLE[interval]).mean().dropna()
+
+# Common interface of the asyncio adapters: fetch(ticker, interval, start, end)
+# returns normalized candles for [start, end), going through the same on-disk
+# cache as the blocking fetchers. base_url can point an adapter at a stub server.
+class Provider:
+    name = None
+    default_url = None
+    intervals = ()
+
+    def __init__(self, session, base_url=None):
+        self.session = session
+        self.base_url = (base_url or self.default_url or '').rstrip('/')
+
+    def _check_interval(self, interval):
+        if interval not in self.intervals:
+            raise ValueError(f"{self.name} does not support interval {interval}")
+
+    async def _get_json(self, url, params=None):
+        response = await self.session.get(url, params=params)
+        if response.status_code != 200:
+            raise Exception(f"Error fetching data: {response.status_code} - {response.text}")
+        return response.json()
+
+    async def fetch(self, ticker, interval, start, end):
+        raise NotImplementedError
+
+class CoinbaseProvider(Provider):
+    name = 'coinbase'
+    default_url = coinbase_candles.BASE_URL
+    intervals = tuple(coinbase_candles.GRANULARITY_MAP)
+
+    async def _fetch_range(self, ticker, granularity, start, end):
+        windows = coinbase_candles.candle_windows(start, end, granularity)
+        pages = await asyncio.gather(*(
+            self._get_json(f"{self.base_url}/products/{ticker}/candles",
+                           {'start': window_start.isoformat(), 'end': window_end.isoformat(), 'granularity': granularity})
+            for window_start, window_end in windows
+        ))
+        return coinbase_candles.candles_frame(pages)
+
+    async def fetch(self, ticker, interval, start, end):
+        self._check_interval(interval)
+        granularity = coinbase_candles.GRANULARITY_MAP[interval]
+        df = await cached_fetch_async('coinbase', ticker, interval, start, end,
+                                      lambda range_start, range_end: self._fetch_range(ticker, granularity, range_start, range_end))
+        return normalize_candles(df)
+
+# CoinGecko only has prices, so each candle is flat at the interval's mean
+# price and has no volume. Tickers resolve through the cached coin registry,
+# or, when the adapter points at another server, that server's /coins/list.
+class CoinGeckoProvider(Provider):
+    name = 'coingecko'
+    default_url = COINGECKO_URL
+    intervals = tuple(COINGECKO_RESAMPLE)
+
+    def __init__(self, session, base_url=None):
+        super().__init__(session, base_url)
+        self.registry = None
+        self.registry_lock = asyncio.Lock()
+
+    async def _registry(self):
+        async with self.registry_lock:
+            if self.registry is None:
+                if self.base_url == coingecko_coins.BASE_URL:
+                    self.registry = await asyncio.to_thread(coingecko_coins.load_registry)
+                else:
+                    self.registry = coingecko_coins.CoinRegistry(await self._get_json(f"{self.base_url}/coins/list"))
+            return self.registry
+
+    async def _fetch_range(self, coin_id, interval, start, end):
+        data = await self._get_json(f"{self.base_url}/coins/{coin_id}/market_chart/range",
+                                    {'vs_currency': 'usd', 'from': int(start.timestamp()), 'to': int(end.timestamp())})
+        return coingecko_prices_frame(data, interval)
+
+    async def fetch(self, ticker, interval, start, end):
+        self._check_interval(interval)
+        coin_id = (await self._registry()).coin_id(ticker)
+        df = await cached_fetch_async('coingecko', coin_id, interval, start, end,
+                                      lambda range_start, range_end: self._fetch_range(coin_id, interval, range_start, range_end))
+        prices = df['price'] if 'price' in df.columns else pd.Series(dtype=np.float64)
+        candles = pd.DataFrame({'open': prices, 'high': prices, 'low': prices, 'close': prices, 'volume': np.nan})
+        return normalize_candles(candles)
+
+class CryptoCompareProvider(Provider):
+    name = 'cryptocompare'
+    default_url = cryptocompare_candles.BASE_URL
+    intervals = tuple(cryptocompare_candles.ENDPOINT_MAP)
+
+    async def _fetch_range(self, ticker, interval, start, end):
+        endpoint, pages = cryptocompare_candles.page_params(ticker, interval, start, end)
+        frames = await asyncio.gather(*(
+            self._get_json(f"{self.base_url}/{endpoint}", params) for params in pages
+        ))
+        return cryptocompare_candles.merge_pages([cryptocompare_candles.candles_frame(data) for data in frames], start, end)
+
+    async def fetch(self, ticker, interval, start, end):
+        self._check_interval(interval)
+        df = await cached_fetch_async('cryptocompare', ticker, interval, start, end,
+                                      lambda range_start, range_end: self._fetch_range(ticker, interval, range_start, range_end))
+        return normalize_candles(df.rename(columns={'volumefrom': 'volume'}))
+
+# yfinance has no async API, so the cached blocking download runs on a thread.
+# yf.download cannot run concurrently, so fetch_many hands all the tickers to
+# fetch_batch, one multi-ticker download, instead of a thread per ticker.
+class YFinanceProvider(Provider):
+    name = 'yfinance'
+    intervals = ('1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h', '1d', '5d', '1wk', '1mo', '3mo')
+
+    async def fetch(self, ticker, interval, start, end):
+        self._check_interval(interval)
+        df = await asyncio.to_thread(cached_yfinance_download, ticker, interval=interval, start=start, end=end)
+        return normalize_candles(df)
+
+    async def fetch_batch(self, tickers, interval, start, end):
+        self._check_interval(interval)
+        frames = await asyncio.to_thread(cached_yfinance_download_many, tickers, interval=interval, start=start, end=end)
+        return {ticker: normalize_candles(frames[ticker]) for ticker in tickers}
+
+PROVIDERS = {
+    'coinbase': CoinbaseProvider,
+    'coingecko': CoinGeckoProvider,
+    'cryptocompare': CryptoCompareProvider,
+    'yfinance': YFinanceProvider,
+}
+
+# Fetch many tickers from one provider concurrently in a single event loop,
+# with at most `concurrency` tickers in flight. Returns ticker -> candles, or
+# the exception raised for that ticker.
+async def fetch_many(source, tickers, interval, period='1mo', start=None, end=None, concurrency=64, base_url=None):
+    end = end or datetime.utcnow()
+    start = start if start is not None else period_to_start(period, end)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with AsyncSession(pool_size=concurrency) as session:
+        provider = PROVIDERS[source](session, base_url)
+        if hasattr(provider, 'fetch_batch'):
+            try:
+                return await provider.fetch_batch(list(tickers), interval, start, end)
+            except Exception as e:
+                return {ticker: e for ticker in tickers}
+
+        async def fetch_one(ticker):
+            async with semaphore:
+                return await provider.fetch(ticker, interval, start, end)
+
+        results = await asyncio.gather(*(fetch_one(ticker) for ticker in tickers), return_exceptions=True)
+    return dict(zip(tickers, results))
+
+def main():
+    parser = argparse.ArgumentParser(description='Fetch normalized candles for many tickers concurrently.')
+    parser.add_argument('--source', type=str, choices=list(PROVIDERS), required=True, help='Data source')
+    parser.add_argument('--tickers', nargs='+', required=True, help='Ticker symbols, e.g. BTC-USD ETH-USD')
+    parser.add_argument('--interval', type=str, default='1d', help='Candle interval (default: 1d)')
+    parser.add_argument('--period', type=str, default='1mo', help='Data period (default: 1mo)')
+    parser.add_argument('--concurrency', type=int, default=64, help='Tickers fetched at once (default: 64)')
+    parser.add_argument('--base-url', type=str, help='Provider base URL, e.g. a local stub server')
+
+    args = parser.parse_args()
+
+    results = asyncio.run(fetch_many(args.source, args.tickers, args.interval, args.period,
+                                     concurrency=args.concurrency, base_url=args.base_url))
+    for ticker, result in results.items():
+        if isinstance(result, Exception):
+            print(f"{ticker}: error: {result}")
+        elif result.empty:
+            print(f"{ticker}: no data")
+        else:
+            print(f"{ticker}: {len(result)} candles from {result.index[0]} to {result.index[-1]}, last close {result['close'].iloc[-1]:.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+import re
+import numpy as np
+import pandas as pd
+
+NANOS_PER_MINUTE = 60 * 1_000_000_000
+NANOS_PER_HOUR = 60 * NANOS_PER_MINUTE
+NANOS_PER_DAY = 24 * NANOS_PER_HOUR
+WEEKDAYS = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+
+# Parse a schedule spec of the form KIND[:ARG][@HH:MM]=AMOUNT:
+#   daily=100             every day
+#   weekly:mon@09:30=700  every Monday at 09:30
+#   every:4h=50           every 4 hours (from midnight UTC, or from @HH:MM)
+#   monthdays:1,15=1500   on the 1st and 15th of every month
+def parse_schedule(spec):
+    match = re.fullmatch(r'(daily|weekly|every|monthdays)(?::([^@=]+))?(?:@(\d{1,2}):(\d{2}))?=([\d.]+)', spec.strip().lower())
+    if not match:
+        raise ValueError(f"Invalid schedule: {spec}")
+
+    kind, arg, hour, minute, amount = match.groups()
+    hour, minute = int(hour or 0), int(minute or 0)
+    if hour > 23 or minute > 59:
+        raise ValueError(f"Invalid schedule: {spec} (time of day must be between 00:00 and 23:59)")
+    schedule = {
+        'name': spec.strip(),
+        'kind': kind,
+        'at': (hour * 60 + minute) * NANOS_PER_MINUTE,
+        'amount': float(amount),
+    }
+    if kind == 'weekly':
+        arg = (arg or 'mon').strip()
+        if arg[:3] in WEEKDAYS:
+            schedule['weekday'] = WEEKDAYS.index(arg[:3])
+        elif arg.isdigit() and int(arg) < 7:
+            schedule['weekday'] = int(arg)
+        else:
+            raise ValueError(f"Invalid schedule: {spec} (weekday must be a day name or 0-6)")
+    elif kind == 'every':
+        every = re.fullmatch(r'(\d+)([hd])', arg or '')
+        if not every or int(every.group(1)) == 0:
+            raise ValueError(f"Invalid schedule: {spec} (interval must be a positive number of hours or days, e.g. 4h)")
+        schedule['every'] = int(every.group(1)) * (NANOS_PER_HOUR if every.group(2) == 'h' else NANOS_PER_DAY)
+    elif kind == 'monthdays':
+        try:
+            days = sorted({int(day) for day in (arg or '1').split(',')})
+        except ValueError:
+            raise ValueError(f"Invalid schedule: {spec} (days must be numbers)")
+        if days[0] < 1 or days[-1] > 31:
+            raise ValueError(f"Invalid schedule: {spec} (days of the month must be between 1 and 31)")
+        schedule['days'] = days
+    return schedule
+
+def _month_length(month):
+    return ((month + np.timedelta64(1, 'M')).astype('datetime64[D]') - month.astype('datetime64[D]')).astype(np.int64)
+
+# Most recent scheduled time at or before every timestamp, plus how late a bar
+# may be and still count as the purchase for that time
+def _triggers(times, schedule):
+    kind = schedule['kind']
+    if kind in ('daily', 'every', 'weekly'):
+        if kind == 'daily':
+            period, offset = NANOS_PER_DAY, schedule['at']
+        elif kind == 'every':
+            period, offset = schedule['every'], schedule['at']
+        else:
+            # The epoch fell on a Thursday
+            period = 7 * NANOS_PER_DAY
+            offset = ((schedule['weekday'] - 3) % 7) * NANOS_PER_DAY + schedule['at']
+        triggers = times - (times - offset) % period
+        return triggers, min(period, NANOS_PER_DAY)
+
+    # Days of the month, clamped to each month's length so e.g. the 31st means
+    # the last day of shorter months. The trigger only depends on the calendar
+    # day, so it is worked out once per day in the range and then gathered.
+    bar_day = (times - schedule['at']) // NANOS_PER_DAY
+    first_day = bar_day.min()
+    calendar = np.arange(first_day, bar_day.max() + 1).astype('datetime64[D]')
+    month = calendar.astype('datetime64[M]')
+    day = (calendar - month.astype('datetime64[D]')).astype(np.int64) + 1
+    days = np.asarray(schedule['days'])
+
+    # Latest target day at or before each day, else the previous month's last
+    targets = np.minimum(days[None, :], _month_length(month)[:, None])
+    k = (targets <= day[:, None]).sum(axis=1) - 1
+    previous = k < 0
+    month = np.where(previous, month - np.timedelta64(1, 'M'), month)
+    target_day = np.where(previous,
+                          np.minimum(days[-1], _month_length(month)),
+                          targets[np.arange(len(k)), np.maximum(k, 0)])
+
+    day_triggers = (month.astype('datetime64[D]') + (target_day - 1)).astype('datetime64[ns]').astype(np.int64) + schedule['at']
+    return day_triggers[bar_day - first_day], NANOS_PER_DAY
+
+# Boolean mask of the bars a schedule buys on, given int64 nanosecond
+# timestamps: the first bar at or after each scheduled time, as long as it falls
+# on that time's day (or interval) and the time is not before the series starts
+def purchase_mask(times, schedule):
+    times = np.asarray(times, dtype=np.int64)
+    if len(times) == 0:
+        return np.zeros(0, dtype=bool)
+    triggers, tolerance = _triggers(times, schedule)
+    first = np.r_[True, triggers[1:] != triggers[:-1]]
+    return first & (times - triggers < tolerance) & (triggers >= times[0])
+
+def _as_ns(index):
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    return index.as_unit('ns').asi8
+
+# Units accumulated and cost of every schedule over one shared price series
+def compare_schedules(prices, schedules):
+    prices = prices.dropna()
+    times = _as_ns(prices.index)
+    values = prices.to_numpy(dtype=np.float64)
+
+    rows = []
+    for schedule in schedules:
+        mask = purchase_mask(times, schedule)
+        purchases = int(mask.sum())
+        units = schedule['amount'] * np.sum(1 / values[mask])
+        cost = schedule['amount'] * purchases
+        rows.append({
+            'schedule': schedule['name'],
+            'purchases': purchases,
+            'units': units,
+            'cost': cost,
+            'avg_price': cost / units if units else float('nan'),
+        })
+    return pd.DataFrame(rows)
+
+# Running units and cost after every bar for one schedule
+def accumulation_curve(prices, schedule):
+    prices = prices.dropna()
+    mask = purchase_mask(_as_ns(prices.index), schedule)
+    units = np.cumsum(np.where(mask, schedule['amount'] / prices.to_numpy(dtype=np.float64), 0.0))
+    cost = np.cumsum(np.where(mask, schedule['amount'], 0.0))
+    return pd.DataFrame({'units': units, 'cost': cost}, index=prices.index)
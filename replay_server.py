@@ -0,0 +1,409 @@
+import argparse
+import bisect
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+import pandas as pd
+import coinbase_candles
+import coingecko_coins
+import cryptocompare_candles
+import http_client
+from ohlcv_cache import CACHE_DIR
+
+# Local stand-in for the provider APIs. Every provider is served under its own
+# prefix, so one server covers them all:
+#   /coinbase/products/{ticker}/candles
+#   /coingecko/coins/list, /coingecko/coins/{id}/market_chart/range
+#   /cryptocompare/histominute, /histohour, /histoday
+# In record mode requests are forwarded to the real API and the responses are
+# merged into per-instrument recordings; in replay mode any request is answered
+# by slicing the recordings, so runs need not repeat the exact recorded windows.
+
+RECORDINGS_DIR = os.path.join(os.path.dirname(CACHE_DIR), 'replay')
+DEFAULT_PORT = 8765
+
+UPSTREAMS = {
+    'coinbase': coinbase_candles.API_URL,
+    'coingecko': coingecko_coins.API_URL,
+    'cryptocompare': cryptocompare_candles.API_URL,
+}
+
+# Environment variable that points each provider's fetchers at a base URL
+URL_VARIABLES = {
+    'coinbase': 'PREDICTORS_COINBASE_URL',
+    'coingecko': 'PREDICTORS_COINGECKO_URL',
+    'cryptocompare': 'PREDICTORS_CRYPTOCOMPARE_URL',
+}
+
+# Largest page each paginated endpoint serves by default, as the real APIs do
+PAGE_SIZES = {
+    'coinbase': coinbase_candles.MAX_CANDLES_PER_REQUEST,
+    'cryptocompare': cryptocompare_candles.MAX_BARS_PER_REQUEST,
+}
+
+def _epoch(value):
+    return int(pd.Timestamp(value).timestamp())
+
+# Recordings merge by timestamp, newer responses replacing older ones
+def _merge_by_time(current, rows, time_of):
+    merged = {time_of(row): row for row in current or []}
+    merged.update((time_of(row), row) for row in rows)
+    return [merged[t] for t in sorted(merged)]
+
+# bisect with key= needs Python 3.10, the minimum in pyproject.toml
+def _between(rows, start, end, time_of):
+    first = bisect.bisect_left(rows, start, key=time_of)
+    last = bisect.bisect_right(rows, end, key=time_of)
+    return rows[first:last]
+
+# Deterministic stand-in prices for any instrument at any times: monthly and
+# daily cycles plus hashed noise, a function of the timestamp alone, so
+# overlapping requests always agree
+def synthetic_prices(name, times):
+    seed = zlib.crc32(name.encode())
+    rng = np.random.default_rng(seed)
+    base = 10 ** rng.uniform(0, 4.5)
+    phases = rng.uniform(0, 2 * np.pi, 2)
+    t = np.asarray(times, dtype=np.int64)
+    noise = ((t * 2654435761 + seed) % 2**32) / 2**32 - 0.5
+    log_price = (np.log(base) + 0.3 * np.sin(2 * np.pi * t / (30 * 86400) + phases[0])
+                 + 0.02 * np.sin(2 * np.pi * t / 86400 + phases[1]) + 0.005 * noise)
+    return np.exp(log_price)
+
+# Open, high, low, close and volume of synthetic bars starting at `times`
+def _synthetic_bars(name, times, bar_seconds):
+    times = np.asarray(times, dtype=np.int64)
+    open_ = synthetic_prices(name, times)
+    close = synthetic_prices(name, times + bar_seconds)
+    high = np.maximum(open_, close) * 1.001
+    low = np.minimum(open_, close) * 0.999
+    volume = 1 + (times * 40503 % 1000) / 10
+    return open_, high, low, close, volume
+
+def _bar_times(start, end, bar_seconds):
+    first = -(-start // bar_seconds) * bar_seconds
+    return np.arange(first, end + 1, bar_seconds, dtype=np.int64)
+
+# Coinbase: [time, low, high, open, close, volume] rows, newest first, for
+# start <= time <= end; windows over the page size are refused like the API does
+def _coinbase_key(match, params):
+    return match['ticker'], int(params['granularity'])
+
+def _coinbase_merge(current, body):
+    return _merge_by_time(current, body, lambda row: row[0])
+
+def _coinbase_synthetic(match, params):
+    granularity = int(params['granularity'])
+    times = _bar_times(_epoch(params['start']), _epoch(params['end']), granularity)
+    open_, high, low, close, volume = _synthetic_bars(match['ticker'], times, granularity)
+    return [list(row) for row in zip(times.tolist(), low.tolist(), high.tolist(), open_.tolist(), close.tolist(), volume.tolist())]
+
+def _coinbase_serve(recording, match, params, page_size):
+    granularity = int(params['granularity'])
+    start, end = _epoch(params['start']), _epoch(params['end'])
+    if (end - start) // granularity > page_size:
+        return 400, {'message': 'granularity too small for the requested time range'}
+    return 200, _between(recording, start, end, lambda row: row[0])[::-1]
+
+# CryptoCompare: the limit + 1 bars ending at toTs, oldest first
+def _cryptocompare_key(match, params):
+    return match['endpoint'], params['fsym'], params.get('tsym', 'USD'), int(params.get('aggregate', 1))
+
+def _cryptocompare_merge(current, body):
+    return _merge_by_time(current, body['Data']['Data'], lambda bar: bar['time'])
+
+def _cryptocompare_bar_seconds(match, params):
+    seconds = {'histominute': 60, 'histohour': 3600, 'histoday': 86400}[match['endpoint']]
+    return seconds * int(params.get('aggregate', 1))
+
+def _cryptocompare_synthetic(match, params):
+    bar_seconds = _cryptocompare_bar_seconds(match, params)
+    to_ts = int(params.get('toTs', time.time())) // bar_seconds * bar_seconds
+    times = to_ts - bar_seconds * np.arange(int(params.get('limit', 1440)), -1, -1, dtype=np.int64)
+    open_, high, low, close, volume = _synthetic_bars(f"{params['fsym']}-{params.get('tsym', 'USD')}", times, bar_seconds)
+    return [{'time': t, 'high': h, 'low': l, 'open': o, 'volumefrom': v, 'volumeto': v * c, 'close': c,
+             'conversionType': 'direct', 'conversionSymbol': ''}
+            for t, o, h, l, c, v in zip(times.tolist(), open_.tolist(), high.tolist(), low.tolist(), close.tolist(), volume.tolist())]
+
+def _cryptocompare_serve(recording, match, params, page_size):
+    # Like the API, at most page_size base bars: limit is cut to page_size / aggregate
+    aggregate = int(params.get('aggregate', 1))
+    limit = min(int(params.get('limit', 1440)), page_size // aggregate)
+    to_ts = int(params.get('toTs', time.time()))
+    bars = _between(recording, float('-inf'), to_ts, lambda bar: bar['time'])[-(limit + 1):]
+    data = {'Aggregated': aggregate > 1, 'TimeFrom': bars[0]['time'] if bars else to_ts,
+            'TimeTo': to_ts, 'Data': bars}
+    return 200, {'Response': 'Success', 'Message': '', 'HasWarning': False, 'Type': 100, 'RateLimit': {}, 'Data': data}
+
+# CoinGecko market_chart/range: [ms, value] pairs between from and to; the
+# synthetic series picks its granularity from the range as the API does
+CHART_SERIES = ('prices', 'market_caps', 'total_volumes')
+
+def _range_key(match, params):
+    return match['coin_id'], params.get('vs_currency', 'usd')
+
+def _range_merge(current, body):
+    current = current or {}
+    return {name: _merge_by_time(current.get(name), body.get(name, []), lambda point: point[0]) for name in CHART_SERIES}
+
+def _range_synthetic(match, params):
+    start, end = int(params['from']), int(params['to'])
+    step = 300 if end - start <= 86400 else 3600 if end - start <= 90 * 86400 else 86400
+    times = _bar_times(start, end, step)
+    prices = synthetic_prices(match['coin_id'], times)
+    ms = (times * 1000).tolist()
+    return {
+        'prices': [list(point) for point in zip(ms, prices.tolist())],
+        'market_caps': [list(point) for point in zip(ms, (prices * 1e7).tolist())],
+        'total_volumes': [list(point) for point in zip(ms, (prices * 1e5).tolist())],
+    }
+
+def _range_serve(recording, match, params, page_size):
+    start, end = int(params['from']) * 1000, int(params['to']) * 1000
+    return 200, {name: _between(recording[name], start, end, lambda point: point[0]) for name in CHART_SERIES}
+
+def _coins_key(match, params):
+    return ('coins_list',)
+
+def _coins_merge(current, body):
+    return body
+
+def _coins_synthetic(match, params):
+    return [{'id': coin_id, 'symbol': symbol, 'name': coin_id.replace('-', ' ').title()}
+            for symbol, coin_id in coingecko_coins.PREFERRED_IDS.items()]
+
+def _coins_serve(recording, match, params, page_size):
+    return 200, recording
+
+ENDPOINTS = [
+    {'provider': 'coinbase', 'pattern': re.compile(r'/products/(?P<ticker>[^/]+)/candles'),
+     'key': _coinbase_key, 'merge': _coinbase_merge, 'synthetic': _coinbase_synthetic, 'serve': _coinbase_serve},
+    {'provider': 'cryptocompare', 'pattern': re.compile(r'/(?P<endpoint>histominute|histohour|histoday)'),
+     'key': _cryptocompare_key, 'merge': _cryptocompare_merge, 'synthetic': _cryptocompare_synthetic, 'serve': _cryptocompare_serve},
+    {'provider': 'coingecko', 'pattern': re.compile(r'/coins/(?P<coin_id>[^/]+)/market_chart/range'),
+     'key': _range_key, 'merge': _range_merge, 'synthetic': _range_synthetic, 'serve': _range_serve},
+    {'provider': 'coingecko', 'pattern': re.compile(r'/coins/list'),
+     'key': _coins_key, 'merge': _coins_merge, 'synthetic': _coins_synthetic, 'serve': _coins_serve},
+]
+
+def find_endpoint(provider, path):
+    for endpoint in ENDPOINTS:
+        match = endpoint['pattern'].fullmatch(path)
+        if endpoint['provider'] == provider and match:
+            return endpoint, match.groupdict()
+    return None, None
+
+# One JSON file per provider and instrument under the recordings directory,
+# kept in memory once read
+class Recordings:
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.loaded = {}
+
+    def _path(self, provider, key):
+        name = re.sub(r'[^A-Za-z0-9._-]', '_', '_'.join(str(part) for part in key))
+        return os.path.join(self.directory, provider, f"{name}.json")
+
+    def _load(self, path):
+        if path not in self.loaded:
+            if os.path.exists(path):
+                with open(path) as f:
+                    self.loaded[path] = json.load(f)
+            else:
+                self.loaded[path] = None
+        return self.loaded[path]
+
+    def get(self, provider, key):
+        with self.lock:
+            return self._load(self._path(provider, key))
+
+    # Merge a response into a recording and rewrite it atomically
+    def record(self, provider, key, merge, body):
+        path = self._path(provider, key)
+        with self.lock:
+            recording = merge(self._load(path), body)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(recording, f, separators=(',', ':'))
+            os.replace(tmp_path, path)
+            self.loaded[path] = recording
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    # record: forward to the real APIs and save what comes back.
+    # synthetic: answer requests without a recording from synthetic_prices.
+    # latency/jitter: seconds added to every response, the jitter drawn
+    # uniformly from a seeded stream. page_size: caps the page of the paginated
+    # endpoints. rate_limit/burst: per-provider token bucket, requests over it
+    # get a 429. throttle_every: also 429 every Nth request per provider.
+    # retry_after: Retry-After seconds sent with a 429 (default: until the
+    # bucket refills, or 1).
+    def __init__(self, address, directory=RECORDINGS_DIR, record=False, synthetic=False, latency=0.0, jitter=0.0,
+                 page_size=None, rate_limit=None, burst=None, throttle_every=None, retry_after=None, seed=None, verbose=False):
+        super().__init__(address, ReplayHandler)
+        self.recordings = Recordings(directory)
+        self.record = record
+        self.synthetic = synthetic
+        self.latency = latency
+        self.jitter = jitter
+        self.page_sizes = {provider: page_size or size for provider, size in PAGE_SIZES.items()}
+        self.buckets = {provider: http_client.TokenBucket(rate_limit, burst or max(1, rate_limit))
+                        for provider in UPSTREAMS} if rate_limit else {}
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        self.stats = Counter()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    # Base URL of every provider on this server, by environment variable
+    def base_urls(self):
+        return {variable: f"{self.url}/{provider}" for provider, variable in URL_VARIABLES.items()}
+
+    def _count(self, provider, outcome):
+        with self.lock:
+            self.stats[f"{provider}.{outcome}"] += 1
+            return self.stats[f"{provider}.requests"]
+
+    def _delay(self):
+        with self.lock:
+            jitter = self.random.uniform(0, self.jitter) if self.jitter else 0
+        if self.latency or jitter:
+            time.sleep(self.latency + jitter)
+
+    # Seconds to send in Retry-After if this request is throttled, else None
+    def _throttle(self, provider, count):
+        if self.throttle_every and count % self.throttle_every == 0:
+            return 1 if self.retry_after is None else self.retry_after
+        bucket = self.buckets.get(provider)
+        if bucket is not None:
+            wait = bucket.take()
+            if wait:
+                return max(1, int(np.ceil(wait))) if self.retry_after is None else self.retry_after
+        return None
+
+    def _forward(self, provider, path, params, endpoint, match):
+        response = http_client.get(f"{UPSTREAMS[provider]}{path}", params=params)
+        if response.status_code == 200:
+            body = response.json()
+            self.recordings.record(provider, endpoint['key'](match, params), endpoint['merge'], body)
+            self._count(provider, 'recorded')
+            return 200, body, {}
+        headers = {'Retry-After': response.headers['Retry-After']} if 'Retry-After' in response.headers else {}
+        return response.status_code, {'error': response.text}, headers
+
+    # Status, JSON body and extra headers for GET /<provider><path>?<params>
+    def respond(self, provider, path, params):
+        endpoint, match = find_endpoint(provider, path)
+        if endpoint is None:
+            return 404, {'error': f"Unknown endpoint: /{provider}{path}"}, {}
+
+        count = self._count(provider, 'requests')
+        self._delay()
+        retry_after = self._throttle(provider, count)
+        if retry_after is not None:
+            self._count(provider, 'throttled')
+            return 429, {'error': 'Too many requests'}, {'Retry-After': str(retry_after)}
+
+        try:
+            if self.record:
+                return self._forward(provider, path, params, endpoint, match)
+
+            recording = self.recordings.get(provider, endpoint['key'](match, params))
+            if recording is None and self.synthetic:
+                recording = endpoint['synthetic'](match, params)
+                self._count(provider, 'synthetic')
+            if recording is None:
+                self._count(provider, 'missing')
+                return 404, {'error': f"No recording for /{provider}{path}"}, {}
+            status, body = endpoint['serve'](recording, match, params, self.page_sizes.get(provider))
+            return status, body, {}
+        except (KeyError, ValueError) as e:
+            return 400, {'error': f"Bad request: {e}"}, {}
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == '/_stats':
+            with self.server.lock:
+                self._send(200, dict(self.server.stats), {})
+            return
+
+        params = {name: values[-1] for name, values in parse_qs(parsed.query).items()}
+        provider, _, path = parsed.path.lstrip('/').partition('/')
+        status, body, headers = self.server.respond(provider, f"/{path}", params)
+        self._send(status, body, headers)
+
+    def _send(self, status, body, headers):
+        payload = json.dumps(body, separators=(',', ':')).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+# Start a server on a background thread, e.g. for a load test in the same
+# process; port 0 picks a free port. Stop it with server.shutdown().
+def start_server(host='127.0.0.1', port=0, **options):
+    server = ReplayServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description='Record provider API responses and replay them from a local server.')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port to listen on (default: {DEFAULT_PORT})')
+    parser.add_argument('--dir', type=str, default=RECORDINGS_DIR, help=f'Recordings directory (default: {RECORDINGS_DIR})')
+    parser.add_argument('--record', action='store_true', help='Forward requests to the real APIs and record the responses')
+    parser.add_argument('--synthetic', action='store_true', help='Answer requests that have no recording with deterministic synthetic data')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response (default: 0)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Up to this many extra seconds, drawn at random per response (default: 0)')
+    parser.add_argument('--page-size', type=int, help='Largest Coinbase/CryptoCompare page served (default: the real limits, 300 and 2000)')
+    parser.add_argument('--rate-limit', type=float, help='Requests per second allowed per provider before answering 429')
+    parser.add_argument('--burst', type=float, help='Burst size of --rate-limit (default: the rate)')
+    parser.add_argument('--throttle-every', type=int, help='Answer every Nth request per provider with 429')
+    parser.add_argument('--retry-after', type=int, help='Retry-After seconds sent with 429 responses')
+    parser.add_argument('--seed', type=int, help='Seed of the latency jitter')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+
+    args = parser.parse_args()
+
+    server = ReplayServer((args.host, args.port), directory=args.dir, record=args.record, synthetic=args.synthetic,
+                          latency=args.latency, jitter=args.jitter, page_size=args.page_size, rate_limit=args.rate_limit,
+                          burst=args.burst, throttle_every=args.throttle_every, retry_after=args.retry_after,
+                          seed=args.seed, verbose=args.verbose)
+    print(f"{'Recording' if args.record else 'Replaying'} on {server.url} ({args.dir}). Point the fetchers at it with:")
+    for variable, url in server.base_urls().items():
+        print(f"  export {variable}={url}")
+    print("and a fresh PREDICTORS_CACHE_DIR so requests are not answered from the candle cache.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+import os
+from datetime import time
+import numpy as np
+import pandas as pd
+
+MINUTES_PER_DAY = 24 * 60
+NANOS_PER_MINUTE = 60 * 1_000_000_000
+
+# Minute of the day (0-1439) of every timestamp as an int64 array. Timezone-aware
+# indexes use their wall-clock time, matching index.hour / index.minute.
+def minute_of_day(index):
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    nanos = index.as_unit('ns').asi8
+    return (nanos // NANOS_PER_MINUTE) % MINUTES_PER_DAY
+
+# Bucket of the day of every timestamp, e.g. the hour when bucket_minutes=60
+def bucket_of_day(index, bucket_minutes=1):
+    return minute_of_day(index) // bucket_minutes
+
+# Aggregate values by bucket of the day with integer bincount reductions instead
+# of a groupby on time objects. Returns one row per non-empty bucket with the
+# mean, count and standard deviation of the values in it, plus the median when
+# asked for, which needs a sort of all the values.
+def time_of_day_profile(index, values, bucket_minutes=60, median=False):
+    buckets = bucket_of_day(index, bucket_minutes)
+    values = np.asarray(values, dtype=np.float64)
+
+    valid = ~np.isnan(values)
+    buckets, values = buckets[valid], values[valid]
+
+    num_buckets = -(-MINUTES_PER_DAY // bucket_minutes)
+    count = np.bincount(buckets, minlength=num_buckets)
+    occupied = np.flatnonzero(count)
+    if len(occupied) == 0:
+        columns = ['mean', 'median', 'count', 'std'] if median else ['mean', 'count', 'std']
+        return pd.DataFrame(columns=columns, index=pd.Index([], name='bucket'))
+
+    # Center on the overall mean so the sum of squares keeps its precision
+    shift = values.mean()
+    centered = values - shift
+    total = np.bincount(buckets, weights=centered, minlength=num_buckets)
+    total_sq = np.bincount(buckets, weights=centered * centered, minlength=num_buckets)
+
+    count = count[occupied]
+    total = total[occupied]
+    total_sq = total_sq[occupied]
+    mean = total / count
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = (total_sq - total * mean) / (count - 1)
+    std = np.sqrt(np.maximum(variance, 0))
+    std[count < 2] = np.nan
+
+    profile = pd.DataFrame({
+        'mean': mean + shift,
+        'count': count,
+        'std': std,
+    }, index=pd.Index(occupied, name='bucket'))
+
+    if median:
+        # Sort by bucket, then value, so each bucket is a contiguous sorted run
+        # and its median is the average of the run's one or two middle values
+        grouped = values[np.lexsort((values, buckets))]
+        starts = np.concatenate(([0], np.cumsum(count)[:-1]))
+        middle = (grouped[starts + (count - 1) // 2] + grouped[starts + count // 2]) / 2
+        profile.insert(1, 'median', middle)
+    return profile
+
+# Clock time at the start of a bucket of the day
+def bucket_time(bucket, bucket_minutes=1):
+    minute = int(bucket) * bucket_minutes
+    return time(minute // 60, minute % 60)
+
+# Per-bucket running count, sum and sum of squares that can be updated with new
+# candles only and persisted between runs, so the time-of-day profile of a long
+# history costs O(new rows) to refresh
+class RunningProfile:
+    def __init__(self, bucket_minutes=1):
+        num_buckets = -(-MINUTES_PER_DAY // bucket_minutes)
+        self.bucket_minutes = bucket_minutes
+        self.count = np.zeros(num_buckets, dtype=np.int64)
+        self.total = np.zeros(num_buckets)
+        self.total_sq = np.zeros(num_buckets)
+        self.shift = None
+        self.last_timestamp = None
+
+    # Ingest rows newer than the last ingested timestamp. last_timestamp is kept
+    # as naive UTC so it survives save/load; tz-aware indexes are compared in
+    # UTC but still bucketed by their wall-clock time.
+    def update(self, index, values):
+        index = pd.DatetimeIndex(index)
+        values = np.asarray(values, dtype=np.float64)
+        instants = index.tz_convert('UTC').tz_localize(None) if index.tz is not None else index
+        if self.last_timestamp is not None:
+            new = instants > self.last_timestamp
+            index, instants, values = index[new], instants[new], values[new]
+        if len(index) == 0:
+            return 0
+
+        self.last_timestamp = instants.max()
+        valid = ~np.isnan(values)
+        buckets, values = bucket_of_day(index, self.bucket_minutes)[valid], values[valid]
+        if len(values) == 0:
+            return 0
+
+        # The first batch's mean is kept as a fixed offset to preserve precision
+        if self.shift is None:
+            self.shift = values.mean()
+        centered = values - self.shift
+        self.count += np.bincount(buckets, minlength=len(self.count))
+        self.total += np.bincount(buckets, weights=centered, minlength=len(self.count))
+        self.total_sq += np.bincount(buckets, weights=centered * centered, minlength=len(self.count))
+        return len(values)
+
+    def to_frame(self):
+        occupied = np.flatnonzero(self.count)
+        count = self.count[occupied]
+        total = self.total[occupied]
+        mean = total / count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variance = (self.total_sq[occupied] - total * mean) / (count - 1)
+        std = np.sqrt(np.maximum(variance, 0))
+        std[count < 2] = np.nan
+        return pd.DataFrame({
+            'mean': mean + (self.shift or 0.0),
+            'count': count,
+            'std': std,
+        }, index=pd.Index(occupied, name='bucket'))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp.npz'
+        np.savez(
+            tmp_path,
+            bucket_minutes=self.bucket_minutes,
+            count=self.count,
+            total=self.total,
+            total_sq=self.total_sq,
+            shift=np.nan if self.shift is None else self.shift,
+            last_timestamp=-1 if self.last_timestamp is None else self.last_timestamp.value,
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, bucket_minutes=1):
+        profile = cls(bucket_minutes)
+        if not os.path.exists(path):
+            return profile
+
+        with np.load(path) as state:
+            if int(state['bucket_minutes']) != bucket_minutes:
+                raise ValueError(f"{path} holds a {int(state['bucket_minutes'])}-minute profile, not {bucket_minutes}-minute")
+            profile.count = state['count']
+            profile.total = state['total']
+            profile.total_sq = state['total_sq']
+            shift = float(state['shift'])
+            profile.shift = None if np.isnan(shift) else shift
+            last_timestamp = int(state['last_timestamp'])
+            profile.last_timestamp = None if last_timestamp < 0 else pd.Timestamp(last_timestamp)
+        return profile
+
+# Walk-forward evaluation of the "buy at the cheapest hour" rule: slide a
+# training window over the history, pick the hour with the lowest average price
+# on it, then measure that hour on the following test window. Per-day, per-hour
+# sums are built once and every window's aggregates come from differences of
+# their cumulative sums, so no window is refit from the raw rows.
+def walk_forward_hours(index, values, train_days=30, test_days=7, step_days=None):
+    step_days = step_days or test_days
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    index, values = index[valid], values[valid]
+    if len(values) == 0:
+        raise ValueError("No price data for walk-forward evaluation.")
+
+    nanos = index.as_unit('ns').asi8
+    day = nanos // (NANOS_PER_MINUTE * MINUTES_PER_DAY)
+    day -= day.min()
+    hour = minute_of_day(index) // 60
+    num_days = day.max() + 1
+
+    cell = day * 24 + hour
+    sums = np.bincount(cell, weights=values, minlength=num_days * 24).reshape(num_days, 24)
+    counts = np.bincount(cell, minlength=num_days * 24).reshape(num_days, 24)
+    cumulative_sums = np.vstack([np.zeros(24), np.cumsum(sums, axis=0)])
+    cumulative_counts = np.vstack([np.zeros(24, dtype=np.int64), np.cumsum(counts, axis=0)])
+
+    train_start = np.arange(0, num_days - train_days - test_days + 1, step_days)
+    if len(train_start) == 0:
+        raise ValueError(f"Need at least {train_days + test_days} days of data for walk-forward evaluation.")
+    test_start = train_start + train_days
+    test_end = test_start + test_days
+
+    def window(start, end):
+        return cumulative_sums[end] - cumulative_sums[start], cumulative_counts[end] - cumulative_counts[start]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        train_sum, train_count = window(train_start, test_start)
+        train_mean = np.where(train_count > 0, train_sum / train_count, np.inf)
+        best_hour = np.argmin(train_mean, axis=1)
+
+        test_sum, test_count = window(test_start, test_end)
+        rows = np.arange(len(train_start))
+        at_best_hour = test_sum[rows, best_hour] / test_count[rows, best_hour]
+        every_4_hours = test_sum[:, ::4].sum(axis=1) / test_count[:, ::4].sum(axis=1)
+        all_hours = test_sum.sum(axis=1) / test_count.sum(axis=1)
+
+    first_day = index[0].normalize()
+    return pd.DataFrame({
+        'train_start': first_day + pd.to_timedelta(train_start, unit='D'),
+        'test_start': first_day + pd.to_timedelta(test_start, unit='D'),
+        'test_end': first_day + pd.to_timedelta(test_end, unit='D'),
+        'best_hour': best_hour,
+        'avg_price_best_hour': at_best_hour,
+        'avg_price_every_4_hours': every_4_hours,
+        'avg_price_all_hours': all_hours,
+    })
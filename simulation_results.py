@@ -0,0 +1,74 @@
+import json
+import os
+import platform
+import sys
+from datetime import datetime, timezone
+import numpy as np
+
+FORMAT_VERSION = 1
+HISTOGRAM_BINS = 100
+
+# Binned counts of values as plain lists, ready to be written out
+def histogram(values, bins=HISTOGRAM_BINS):
+    counts, edges = np.histogram(np.asarray(values, dtype=np.float64), bins=bins)
+    return {'edges': edges.tolist(), 'counts': counts.tolist()}
+
+# Merge a fine histogram (such as price_simulation's 65536-bin log-price grid)
+# into at most `bins` bins over its occupied range. Counts are only summed, so
+# totals are exact; edges are whatever the fine edges are at the merge points.
+def coarsen_histogram(edges, counts, bins=HISTOGRAM_BINS, transform=None):
+    counts = np.asarray(counts)
+    occupied = np.flatnonzero(counts)
+    if len(occupied) == 0:
+        return {'edges': [], 'counts': []}
+    first, last = occupied[0], occupied[-1] + 1
+    counts, edges = counts[first:last], np.asarray(edges)[first:last + 1]
+
+    factor = -(-len(counts) // bins)
+    padded = np.zeros(-(-len(counts) // factor) * factor, dtype=counts.dtype)
+    padded[:len(counts)] = counts
+    merged = padded.reshape(-1, factor).sum(axis=1)
+    merged_edges = np.append(edges[:-1:factor], edges[-1])
+    if transform is not None:
+        merged_edges = transform(merged_edges)
+    return {'edges': merged_edges.tolist(), 'counts': merged.tolist()}
+
+# What produced a result file: when, how long it took, the command line,
+# library versions and the simulation parameters
+def run_metadata(params, started=None):
+    now = datetime.now(timezone.utc)
+    metadata = {
+        'created_at': now.isoformat(),
+        'argv': sys.argv,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'params': params,
+    }
+    if started is not None:
+        metadata['elapsed_seconds'] = (now - started).total_seconds()
+    return metadata
+
+def _to_builtin(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.random.SeedSequence):
+        return value.entropy
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+# Write results and metadata as one compact JSON document, replacing the file
+# atomically so a scheduler never picks up a half-written result
+def write_results(path, results, metadata):
+    document = {'format_version': FORMAT_VERSION, 'metadata': metadata, 'results': results}
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(document, f, separators=(',', ':'), default=_to_builtin)
+    os.replace(tmp_path, path)
+
+def read_results(path):
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,107 @@
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from ohlcv_cache import cached_yfinance_download
+from dca_backtest import LadderBacktest, summarize_orders
+
+VALID_PERIODS = ['1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y', 'ytd', 'max']
+VALID_INTERVALS = ['1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h', '1d', '5d', '1wk', '1mo', '3mo']
+DISTRIBUTIONS = ['equal', 'linear', 'geometric']
+
+# Share of the daily budget given to each level, deepest level last
+def level_weights(num_levels, distribution):
+    if distribution == 'equal':
+        weights = np.ones(num_levels)
+    elif distribution == 'linear':
+        weights = np.arange(1, num_levels + 1, dtype=np.float64)
+    elif distribution == 'geometric':
+        weights = 2.0 ** np.arange(num_levels)
+    else:
+        raise ValueError(f"Unknown distribution: {distribution}")
+    return weights / weights.sum()
+
+# Every combination of ladder shape; budgets are applied afterwards because
+# fills do not depend on order size, so each shape is backtested only once
+def ladder_grid(num_levels, spacings, distributions, ttl_hours):
+    return [
+        {'num_levels': n, 'spacing': spacing, 'distribution': distribution, 'ttl_hours': ttl}
+        for n, spacing, distribution, ttl in itertools.product(num_levels, spacings, distributions, ttl_hours)
+    ]
+
+_backtest = None
+
+def _init_worker(df):
+    global _backtest
+    _backtest = LadderBacktest(df)
+
+def _evaluate(config):
+    levels = config['spacing'] * np.arange(1, config['num_levels'] + 1)
+    weights = level_weights(config['num_levels'], config['distribution'])
+    orders = _backtest.run(levels, weights, ttl=pd.Timedelta(hours=config['ttl_hours']))
+    return {**config, **summarize_orders(orders)}
+
+# Backtest every ladder in the grid against one price series, sharing the
+# prepared series across candidates and spreading them over worker processes
+def sweep(df, configs, budgets, workers=None):
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(df)
+        results = [_evaluate(config) for config in configs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(df,)) as executor:
+            chunksize = max(1, len(configs) // (workers * 4))
+            results = list(executor.map(_evaluate, configs, chunksize=chunksize))
+
+    # Benchmark: the same budget spent at every day's open
+    opens = df['Open'] if 'Open' in df.columns else df['Close']
+    daily_opens = opens.dropna().groupby(opens.dropna().index.normalize()).first()
+    benchmark_price = len(daily_opens) / (1 / daily_opens).sum()
+
+    shapes = pd.DataFrame(results)
+    table = shapes.merge(pd.DataFrame({'daily_budget': budgets}), how='cross')
+    table['invested'] *= table['daily_budget']
+    table['units'] *= table['daily_budget']
+    table['discount_pct'] = (benchmark_price - table['avg_price']) / benchmark_price * 100
+    return table, benchmark_price
+
+def main():
+    parser = argparse.ArgumentParser(description='Grid-search daily limit-order DCA ladders against one price history.')
+    parser.add_argument('--ticker', type=str, default='BTC-USD', help='Ticker symbol (default: BTC-USD)')
+    parser.add_argument('--period', type=str, choices=VALID_PERIODS, default='1mo', help='Data period (default: 1mo)')
+    parser.add_argument('--interval', type=str, choices=VALID_INTERVALS, default='1h', help='Data interval (default: 1h)')
+    parser.add_argument('--num_levels', nargs='+', type=int, default=[3, 5, 8], help='Numbers of ladder levels (default: 3 5 8)')
+    parser.add_argument('--spacings', nargs='+', type=float, default=[0.25, 0.5, 1, 2], help='Percent between consecutive levels (default: 0.25 0.5 1 2)')
+    parser.add_argument('--distributions', nargs='+', choices=DISTRIBUTIONS, default=DISTRIBUTIONS, help='How the budget is split across levels (default: all)')
+    parser.add_argument('--budgets', nargs='+', type=float, default=[250], help='Daily budgets in USD (default: 250)')
+    parser.add_argument('--ttl_hours', nargs='+', type=float, default=[24], help='Order lifetimes in hours (default: 24)')
+    parser.add_argument('--rank_by', choices=['avg_price', 'units', 'fill_rate', 'discount_pct'], default='avg_price', help='Ranking column (default: avg_price)')
+    parser.add_argument('--top', type=int, default=20, help='Number of results to print (default: 20)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--output', type=str, help='Write the full ranked table to this CSV file')
+
+    args = parser.parse_args()
+
+    df = cached_yfinance_download(args.ticker, interval=args.interval, period=args.period)
+    if df.empty:
+        print("No data fetched, please check the ticker symbol and internet connection.")
+        return
+
+    configs = ladder_grid(args.num_levels, args.spacings, args.distributions, args.ttl_hours)
+    table, benchmark_price = sweep(df, configs, args.budgets, args.workers)
+
+    ascending = args.rank_by == 'avg_price'
+    table = table.sort_values(args.rank_by, ascending=ascending, na_position='last').reset_index(drop=True)
+
+    print(f"Evaluated {len(table)} configurations on {len(df)} {args.interval} bars of {args.ticker}")
+    print(f"Benchmark (daily buy at the open) Avg Price: {benchmark_price:.2f} USD\n")
+    print(table.head(args.top).to_string(float_format=lambda x: f"{x:.4f}"))
+
+    if args.output:
+        table.to_csv(args.output, index=False)
+        print(f"\nFull results saved to {args.output}")
+
+if __name__ == '__main__':
+    main()
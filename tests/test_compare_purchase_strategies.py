@@ -0,0 +1,27 @@
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import compare_purchase_strategies
+from ohlcv_cache import period_to_start
+
+def _fake_download_many(tickers, interval='1d', period=None, start=None, end=None):
+    end = datetime.utcnow()
+    index = pd.date_range(period_to_start(period, end), end, freq='h')
+    close = 100 + np.sin(np.arange(len(index)) * 2 * np.pi / 24)
+    return {ticker: pd.DataFrame({'Close': close}, index=index) for ticker in tickers}
+
+def test_walk_forward_runs_with_default_arguments(monkeypatch, capsys):
+    monkeypatch.setattr(compare_purchase_strategies, 'cached_yfinance_download_many', _fake_download_many)
+    monkeypatch.setattr('sys.argv', ['compare_purchase_strategies.py', '--walk_forward'])
+
+    compare_purchase_strategies.main()
+
+    out = capsys.readouterr().out
+    assert 'for the past 3mo' in out
+    assert 'Need at least' not in out
+    assert 'BTC-USD: 8 windows' in out
+
+def test_walk_forward_period_covers_the_windows():
+    assert compare_purchase_strategies.walk_forward_period(30, 7) == '3mo'
+    assert compare_purchase_strategies.walk_forward_period(20, 5) == '1mo'
+    assert compare_purchase_strategies.walk_forward_period(180, 30) == '1y'
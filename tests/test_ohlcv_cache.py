@@ -0,0 +1,26 @@
+import pandas as pd
+import ohlcv_cache
+from ohlcv_cache import cached_fetch
+
+def _hourly_bars(start, end, tz):
+    index = pd.date_range(start, end, freq='h', inclusive='left', tz='UTC').tz_convert(tz)
+    return pd.DataFrame({'Close': range(len(index))}, index=index, dtype=float)
+
+def test_cached_candles_keep_the_source_timezone(tmp_path, monkeypatch):
+    monkeypatch.setattr(ohlcv_cache, 'CACHE_DIR', str(tmp_path))
+    calls = []
+
+    def fetch_range(range_start, range_end):
+        calls.append((range_start, range_end))
+        return _hourly_bars(range_start, range_end, 'America/New_York')
+
+    start, end = pd.Timestamp('2024-03-08'), pd.Timestamp('2024-03-12')
+    fetched = cached_fetch('test', 'SPY', '1h', start, end, fetch_range)
+    cached = cached_fetch('test', 'SPY', '1h', start, end, fetch_range)
+
+    assert len(calls) == 1  # The second call is served from the store
+    assert str(cached.index.tz) == 'America/New_York'
+    pd.testing.assert_frame_equal(cached, fetched, check_freq=False)
+    # Local hours shift across the DST change on 2024-03-10; UTC hours do not
+    assert cached.index[0] == pd.Timestamp('2024-03-07 19:00', tz='America/New_York')
+    assert len(cached) == 4 * 24
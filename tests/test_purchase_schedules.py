@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+from purchase_schedules import parse_schedule, purchase_mask
+
+def _purchase_times(spec, index):
+    mask = purchase_mask(index.as_unit('ns').asi8, parse_schedule(spec))
+    return index[mask]
+
+def test_parses_every_kind():
+    assert parse_schedule('daily@09:30=100')['at'] == (9 * 60 + 30) * 60 * 10**9
+    assert parse_schedule('weekly:fri=700')['weekday'] == 4
+    assert parse_schedule('weekly:6=700')['weekday'] == 6
+    assert parse_schedule('every:4h=50')['every'] == 4 * 3600 * 10**9
+    assert parse_schedule('monthdays:15,1,15=1500')['days'] == [1, 15]
+
+def test_every_uses_time_of_day_as_offset():
+    index = pd.date_range('2024-01-01', periods=24, freq='h')
+    bought = _purchase_times('every:4h@01:00=50', index)
+    assert list(bought.hour) == [1, 5, 9, 13, 17, 21]
+
+@pytest.mark.parametrize('spec', [
+    'every:0h=50',
+    'every:0d=50',
+    'every:4x=50',
+    'weekly:funday=100',
+    'weekly:9=100',
+    'weekly:7=100',
+    'daily@24:00=100',
+    'daily@09:60=100',
+    'monthdays:0,15=100',
+    'monthdays:32=100',
+    'monthdays:x=100',
+    'hourly=100',
+])
+def test_rejects_invalid_schedules(spec):
+    with pytest.raises(ValueError, match='Invalid schedule'):
+        parse_schedule(spec)
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+from seasonality import RunningProfile, time_of_day_profile
+
+def test_running_profile_matches_batch_profile():
+    index = pd.date_range('2024-01-01', periods=3 * 1440, freq='min')
+    values = np.random.default_rng(0).random(len(index))
+
+    profile = RunningProfile(bucket_minutes=60)
+    profile.update(index[:2000], values[:2000])
+    profile.update(index[1000:], values[1000:])  # Overlapping rows are skipped
+
+    expected = time_of_day_profile(index, values, bucket_minutes=60)
+    np.testing.assert_allclose(profile.to_frame()['mean'], expected['mean'])
+    np.testing.assert_array_equal(profile.to_frame()['count'], expected['count'])
+
+def test_reloaded_profile_accepts_tz_aware_index(tmp_path):
+    path = str(tmp_path / 'profile.npz')
+    index = pd.date_range('2024-01-01', periods=48, freq='h', tz='UTC')
+    values = np.arange(48, dtype=np.float64)
+
+    profile = RunningProfile(bucket_minutes=60)
+    assert profile.update(index[:24], values[:24]) == 24
+    profile.save(path)
+
+    reloaded = RunningProfile.load(path, bucket_minutes=60)
+    assert reloaded.last_timestamp == pd.Timestamp('2024-01-01 23:00')
+    assert reloaded.update(index, values) == 24
+    assert reloaded.last_timestamp == pd.Timestamp('2024-01-02 23:00')
+
+    # The same instants in another timezone are not ingested twice
+    assert reloaded.update(index.tz_convert('America/New_York'), values) == 0
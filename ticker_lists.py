@@ -0,0 +1,12 @@
+# Ticker symbols from --tickers plus a --tickers-file with one symbol per line,
+# where # starts a comment (on its own line or after a symbol). Duplicates are
+# dropped, keeping the first occurrence.
+def read_tickers(args):
+    tickers = list(args.tickers or [])
+    if args.tickers_file:
+        with open(args.tickers_file) as f:
+            for line in f:
+                line = line.split('#')[0].strip()
+                if line:
+                    tickers.append(line)
+    return list(dict.fromkeys(tickers))
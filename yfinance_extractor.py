@@ -1,24 +1,166 @@
-import yfinance as yf
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
 import pandas as pd
+from ohlcv_cache import cached_yfinance_download, cached_yfinance_download_many, interval_length
+from price_series import PriceSeries, series_path
+from ticker_lists import read_tickers
 
-# Function to fetch historical BTC data and save it to a CSV file
+VALID_INTERVALS = ['1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h', '1d']
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+MANIFEST = 'manifest.json'
+
+# Function to fetch historical BTC data and save it to a CSV file, plus a
+# memory-mapped copy next to it that loads without parsing
 def fetch_btc_data(start_date, end_date, filename):
     # Fetch Bitcoin historical data from Yahoo Finance
-    btc_data = yf.download('BTC-USD', start=start_date, end=end_date)
+    btc_data = cached_yfinance_download('BTC-USD', interval='1d', start=start_date, end=end_date)
+    btc_data.index.name = 'Date'
+
+    # Keep only the 'Close' column
+    btc_data = btc_data[['Close']]
+
+    # Save the data to a CSV file, then the binary copy so it is the newer one
+    btc_data.reset_index().to_csv(filename, index=False)
+    PriceSeries.from_frame(btc_data).save(series_path(filename))
+    print(f"Data successfully saved to {filename} and {series_path(filename)}")
+
+def output_path(output_dir, ticker, interval):
+    return os.path.join(output_dir, f"{ticker.replace('/', '_')}_{interval}.csv")
+
+# The manifest records, per ticker and interval, the last bar written and the
+# file size right after writing it. Anything past that size is a partial append
+# from an interrupted run and is cut off before resuming.
+def load_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+# Timestamp of the last row of an existing CSV, read from its tail
+def last_timestamp(path):
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 4096))
+        lines = f.read().splitlines()
+    if len(lines) < 2:
+        return None
+    try:
+        return pd.Timestamp(lines[-1].split(b',')[0].decode())
+    except ValueError:
+        return None
+
+# First bar still to fetch for one ticker, undoing any partial append first
+def resume_point(path, entry, start, step):
+    if entry and os.path.exists(path):
+        if os.path.getsize(path) > entry['size']:
+            with open(path, 'r+b') as f:
+                f.truncate(entry['size'])
+        return pd.Timestamp(entry['last']) + step
+    if os.path.exists(path):
+        last = last_timestamp(path)
+        if last is not None:
+            return last + step
+    return pd.Timestamp(start)
+
+# Append the closed bars of one download to a ticker's file and return the
+# manifest entry describing the file afterwards. Files are kept in naive UTC
+# whatever timezone the exchange reports in.
+def append_rows(path, df, resume, now, step, entry):
+    df = df[[column for column in COLUMNS if column in df.columns]]
+    if isinstance(df.index, pd.DatetimeIndex) and df.index.tz is not None:
+        df = df.set_axis(df.index.tz_convert('UTC').tz_localize(None))
+    df = df[(df.index >= resume) & (df.index + step <= now)].dropna(how='all')
+    if df.empty:
+        return entry, 0
+
+    df.index.name = 'Date'
+    df.to_csv(path, mode='a', header=not os.path.exists(path) or os.path.getsize(path) == 0)
+    rows = len(df) + (entry['rows'] if entry else 0)
+    return {'last': df.index[-1].isoformat(), 'size': os.path.getsize(path), 'rows': rows}, len(df)
+
+# Bring one file per ticker up to date: tickers resuming from the same bar are
+# downloaded together in batches, only bars after each file's last row are
+# appended, and the manifest is saved after every ticker. The downloads
+# themselves run one at a time (see ohlcv_cache._yf_download); the worker
+# threads overlap writing one batch's files with downloading the next.
+def extract(tickers, interval, start, end=None, output_dir='data', batch_size=50, workers=4):
+    os.makedirs(output_dir, exist_ok=True)
+    step = interval_length(interval)
+    now = pd.Timestamp(datetime.utcnow())
+    end = pd.Timestamp(end) if end is not None else now
+    manifest = load_manifest(output_dir)
+    lock = threading.Lock()
+
+    by_resume = {}
+    for ticker in dict.fromkeys(tickers):
+        key = f"{ticker}|{interval}"
+        resume = resume_point(output_path(output_dir, ticker, interval), manifest.get(key), start, step)
+        if resume < end:
+            by_resume.setdefault(resume, []).append(ticker)
+
+    batches = [(resume, group[i:i + batch_size])
+               for resume, group in by_resume.items()
+               for i in range(0, len(group), batch_size)]
+
+    appended = {}
+
+    def run(resume, batch):
+        frames = cached_yfinance_download_many(batch, interval=interval, start=resume, end=end)
+        for ticker in batch:
+            key = f"{ticker}|{interval}"
+            path = output_path(output_dir, ticker, interval)
+            previous = manifest.get(key) if os.path.exists(path) else None
+            entry, count = append_rows(path, frames.get(ticker, pd.DataFrame()), resume, now, step, previous)
+            with lock:
+                appended[ticker] = count
+                if entry:
+                    manifest[key] = entry
+                    save_manifest(output_dir, manifest)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run, resume, batch): batch for resume, batch in batches}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Batch {', '.join(futures[future])} failed: {e}")
 
-    # Keep only the 'Close' column and reset the index to have a 'Date' column
-    btc_data = btc_data[['Close']].reset_index()
+    return appended
 
-    # Save the data to a CSV file
-    btc_data.to_csv(filename, index=False)
-    print(f"Data successfully saved to {filename}")
+def main():
+    parser = argparse.ArgumentParser(description='Download and incrementally update price history for many tickers.')
+    parser.add_argument('--tickers', nargs='+', help='Ticker symbols, e.g. BTC-USD ETH-USD')
+    parser.add_argument('--tickers-file', type=str, help='File with one ticker per line (# starts a comment)')
+    parser.add_argument('--interval', type=str, choices=VALID_INTERVALS, default='1d', help='Bar interval (default: 1d)')
+    parser.add_argument('--start', type=str, default='2024-01-01', help='First date for tickers without a file yet (default: 2024-01-01)')
+    parser.add_argument('--end', type=str, help='End date, exclusive (default: now)')
+    parser.add_argument('--output-dir', type=str, default='data', help='Directory for the CSV files and manifest (default: data)')
+    parser.add_argument('--batch-size', type=int, default=50, help='Tickers per download request (default: 50)')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent download batches (default: 4)')
+    parser.add_argument('--btc-csv', type=str, default='btc_prices.csv', help='Without tickers, write BTC-USD daily closes for --start..--end here (default: btc_prices.csv)')
 
-# Define parameters
-start_date = '2024-01-01'  # Start date for fetching historical data
-end_date = '2024-12-31'    # End date for fetching historical data
-filename = 'btc_prices.csv' # Name of the CSV file to save data
+    args = parser.parse_args()
 
-# Fetch BTC data and save to CSV
-fetch_btc_data(start_date, end_date, filename)
+    tickers = read_tickers(args)
+    if not tickers:
+        fetch_btc_data(args.start, args.end or '2024-12-31', args.btc_csv)
+        return
 
+    appended = extract(tickers, args.interval, args.start, args.end, args.output_dir, args.batch_size, args.workers)
+    updated = sum(1 for count in appended.values() if count)
+    print(f"Appended {sum(appended.values())} rows to {updated} of {len(tickers)} tickers in {args.output_dir}")
 
+if __name__ == '__main__':
+    main()